@@ -1,6 +1,10 @@
+import sys
 import asyncio
 import random
 import math
+import time
+import threading
+from collections import OrderedDict
 import poke_battle_sim as pb
 import copy
 from poke_battle_sim.conf import global_data as gd
@@ -8,15 +12,27 @@ from poke_battle_sim.conf import global_settings as gs
 from poke_battle_sim.core.move import Move
 
 from pokemon_genome import PokemonGenome
+from search_stats import SearchStats
+from sim_runtime import ensure_simulator_started, simulator_rng
+from matchup_filter import predict_matchup
+from battle_replay import turn_seed, encode_turn
 
 CUSTOM_POKEMON_NICKNAME = "MEWTHREE" 
 
+# Battles played against each gauntlet opponent (config.SCORE_PER_WIN scores their wins)
+BATTLES_PER_OPPONENT = 3
+
 class SimBattle(pb.Battle):
     """
     A subclass of Battle that disables text logging for performance.
+    Used for every evaluation battle unless BATTLE_LOG asks for the text.
     """
     def add_text(self, txt: str):
-        pass 
+        pass
+
+    def _pop_text(self):
+        # Two-turn moves (fly, dig, solar beam...) replace their last line; there is none here
+        pass
 
 def _genome_to_sim_pokemon(genome: PokemonGenome) -> pb.Pokemon:
     ivs = [31, 31, 31, 31, 31, 31]
@@ -81,11 +97,113 @@ def _gauntlet_to_sim_pokemon(opponent_info: dict) -> pb.Pokemon:
     opp_poke.cur_hp = opp_poke.stats_actual[gs.HP]
     return opp_poke
 
+# Set by battle.start() on every Pokémon; everything else is the state a simulated turn continues from
+_BATTLE_LINKS = ("cur_battle", "enemy", "in_battle")
+
 def _clone_pokemon_state(poke: pb.Pokemon) -> pb.Pokemon:
-    return poke.fast_copy()
+    clone = poke.fast_copy()
+    # fast_copy() keeps the flag, and pb.Battle refuses Pokémon already in a battle
+    clone.in_battle = False
+    # Pending turns of two-turn and multi-turn moves, which fast_copy() leaves out
+    for move in poke.next_moves.queue:
+        clone.next_moves.put(move)
+    return clone
+
+def _start_simulated_battle(sim_battle: pb.Battle):
+    """
+    Starts a battle between cloned Pokémon without losing their mid-battle state:
+    battle.start() resets stat stages, volatile statuses, charging moves and so
+    on as for a fresh send-out, so the clones' state is put back afterwards.
+    """
+    pokemon = (sim_battle.t1.poke_list[0], sim_battle.t2.poke_list[0])
+    states = [dict(poke.__dict__) for poke in pokemon]
+    sim_battle.start()
+    for poke, state in zip(pokemon, states):
+        for name in _BATTLE_LINKS:
+            state.pop(name)
+        poke.__dict__.update(state)
+
+# --- BUILD CACHE ---
+# Building a pb.Pokemon (name lookup, move/ability/nature validation, stat
+# calculation, Arceus patching for custom genomes) is far more expensive than
+# copying one, and a genome never changes while it is evaluated. Built
+# Pokémon are kept as templates and every battle gets its own clone.
+
+_GENOME_TEMPLATE_CACHE_SIZE = 256
+_genome_templates = OrderedDict()   # genome.fingerprint() -> pb.Pokemon (LRU)
+_genome_templates_lock = threading.Lock()   # The LRU updates are not atomic (thread backend)
+_opponent_templates = {}            # opponent key -> pb.Pokemon
+
+def _clone_fresh_pokemon(template: pb.Pokemon) -> pb.Pokemon:
+    """
+    Copies a Pokémon that has never entered a battle.
+    (fast_copy() expects battle-only attributes such as stats_effective.)
+    """
+    poke = pb.Pokemon.__new__(pb.Pokemon)
+    poke.__dict__.update(template.__dict__)
+    poke.stats_actual = template.stats_actual[:]
+    poke.moves = [m.get_tcopy() for m in template.o_moves]
+    poke.o_moves = poke.moves
+    return poke
+
+def _get_genome_template(genome: PokemonGenome) -> pb.Pokemon:
+    """Returns the cached built Pokémon for this genome (raises if the genome is invalid)."""
+    key = genome.fingerprint()
+    with _genome_templates_lock:
+        template = _genome_templates.get(key)
+        if template is not None:
+            _genome_templates.move_to_end(key)
+            return template
+    template = _genome_to_sim_pokemon(genome)
+    with _genome_templates_lock:
+        _genome_templates[key] = template
+        if len(_genome_templates) > _GENOME_TEMPLATE_CACHE_SIZE:
+            _genome_templates.popitem(last=False)
+    return template
+
+def _opponent_key(opponent_info: dict) -> tuple:
+    return (opponent_info["name"], tuple(opponent_info["moves"]), opponent_info["ability"],
+            opponent_info.get("evs"), opponent_info["nature"])
+
+def opponent_signature(opponent_info: dict) -> str:
+    """Identifies a gauntlet entry's set; stored results only count against the same set."""
+    return repr(_opponent_key(opponent_info))
+
+def _get_opponent_template(opponent_info: dict) -> pb.Pokemon:
+    """Returns the cached built Pokémon for a gauntlet entry (raises if the entry is invalid)."""
+    key = _opponent_key(opponent_info)
+    template = _opponent_templates.get(key)
+    if template is None:
+        template = _opponent_templates[key] = _gauntlet_to_sim_pokemon(opponent_info)
+    return template
+
+def warm_gauntlet_templates(config_data: dict):
+    """Builds the templates of every valid gauntlet entry ahead of the first battle."""
+    for opponent_info in config_data.get('GAUNTLET', []):
+        try:
+            _get_opponent_template(opponent_info)
+        except Exception:
+            pass  # Reported by matchup_opponents when a genome meets it
 
 # --- MINIMAX IMPLEMENTATION ---
 
+class SearchContext:
+    """
+    Settings (and optional SearchStats) of the minimax search of one battle.
+    Passed down the search explicitly instead of living in module globals, so
+    battles with different settings can run concurrently in one process
+    (threads, event loop) and each side of a battle can search differently.
+    """
+    __slots__ = ("depth", "stats")
+
+    def __init__(self, depth=2, stats=None):
+        self.depth = depth
+        self.stats = stats
+
+    @classmethod
+    def from_config(cls, config_data: dict, stats=None) -> "SearchContext":
+        return cls(config_data.get('MINIMAX_DEPTH', 2), stats)
+
 def _evaluate_state_enhanced(battle: pb.Battle, my_trainer: pb.Trainer) -> float:
     if battle.winner == my_trainer: return 1000000.0
     if battle.winner: return -1000000.0
@@ -155,8 +273,12 @@ def _get_ordered_moves(pokemon: pb.Pokemon, opponent: pb.Pokemon) -> list:
     moves.sort(key=move_heuristic, reverse=True)
     return moves
 
-def _minimax_ab(battle: pb.Battle, depth: int, alpha: float, beta: float, is_maximizing: bool, my_trainer: pb.Trainer, opp_trainer: pb.Trainer, my_move_choice=None) -> float:
+def _minimax_ab(battle: pb.Battle, depth: int, alpha: float, beta: float, is_maximizing: bool, my_trainer: pb.Trainer, opp_trainer: pb.Trainer, context: SearchContext, my_move_choice=None) -> float:
+    stats = context.stats
+    if stats is not None: stats.nodes += 1
+
     if depth == 0 or battle.is_finished():
+        if stats is not None: stats.leaf_evals += 1
         return _evaluate_state_enhanced(battle, my_trainer)
 
     if is_maximizing:
@@ -164,10 +286,11 @@ def _minimax_ab(battle: pb.Battle, depth: int, alpha: float, beta: float, is_max
         my_moves = _get_ordered_moves(my_trainer.current_poke, opp_trainer.current_poke)
         
         for move in my_moves:
-            val = _minimax_ab(battle, depth, alpha, beta, False, my_trainer, opp_trainer, my_move_choice=move)
+            val = _minimax_ab(battle, depth, alpha, beta, False, my_trainer, opp_trainer, context, my_move_choice=move)
             best_val = max(best_val, val)
             alpha = max(alpha, best_val)
             if beta <= alpha:
+                if stats is not None: stats.cutoffs += 1
                 break
         return best_val
         
@@ -176,6 +299,7 @@ def _minimax_ab(battle: pb.Battle, depth: int, alpha: float, beta: float, is_max
         opp_moves = _get_ordered_moves(opp_trainer.current_poke, my_trainer.current_poke)
         
         for move in opp_moves:
+            if stats is not None: start = time.perf_counter()
             try:
                 sim_poke_t1 = _clone_pokemon_state(battle.t1.current_poke)
                 sim_poke_t2 = _clone_pokemon_state(battle.t2.current_poke)
@@ -190,22 +314,23 @@ def _minimax_ab(battle: pb.Battle, depth: int, alpha: float, beta: float, is_max
                     move_t1, move_t2 = ['move', move.name], ['move', my_move_choice.name]
                 
                 sim_battle = SimBattle(sim_t1, sim_t2)
-                sim_battle.start()
+                _start_simulated_battle(sim_battle)
                 sim_battle.turn(move_t1, move_t2)
+                if stats is not None: stats.add_ply(depth, time.perf_counter() - start)
                 
-                val = _minimax_ab(sim_battle, depth - 1, alpha, beta, True, sim_my, sim_opp)
+                val = _minimax_ab(sim_battle, depth - 1, alpha, beta, True, sim_my, sim_opp, context)
                 
                 best_val = min(best_val, val)
                 beta = min(beta, best_val)
                 if beta <= alpha:
+                    if stats is not None: stats.cutoffs += 1
                     break
             except Exception:
+                if stats is not None: stats.turn_errors += 1
                 continue 
 
         return best_val
 
-_MINIMAX_CONFIG_HACK = {}
-
 def _estimate_damage(attacker: pb.Pokemon, defender: pb.Pokemon, move: Move) -> float:
     if not move.power: return 0.0
         
@@ -230,10 +355,9 @@ def _estimate_damage(attacker: pb.Pokemon, defender: pb.Pokemon, move: Move) ->
         
     return damage
 
-def get_best_move_minimax(battle: pb.Battle, player_trainer: pb.Trainer, opponent_trainer: pb.Trainer) -> list:
-    global _MINIMAX_CONFIG_HACK
-    config_data = _MINIMAX_CONFIG_HACK
-    depth = config_data.get('MINIMAX_DEPTH', 2) 
+def get_best_move_minimax(battle: pb.Battle, player_trainer: pb.Trainer, opponent_trainer: pb.Trainer,
+                          context: SearchContext) -> list:
+    depth = context.depth
     
     best_move = None
     best_val = -math.inf
@@ -245,14 +369,22 @@ def get_best_move_minimax(battle: pb.Battle, player_trainer: pb.Trainer, opponen
     if len(my_moves) == 1:
         return ['move', my_moves[0].name]
 
+    stats = context.stats
+    if stats is not None:
+        stats.decisions += 1
+        start = time.perf_counter()
+
     for move in my_moves:
-        val = _minimax_ab(battle, depth, alpha, beta, False, player_trainer, opponent_trainer, my_move_choice=move)
+        if stats is not None: stats.root_moves += 1
+        val = _minimax_ab(battle, depth, alpha, beta, False, player_trainer, opponent_trainer, context, my_move_choice=move)
         
         if val > best_val:
             best_val = val
             best_move = move
         
         alpha = max(alpha, best_val)
+
+    if stats is not None: stats.search_time += time.perf_counter() - start
         
     if best_move:
         return ['move', best_move.name]
@@ -268,146 +400,272 @@ async def evaluate_fitness(genome: PokemonGenome, config_data: dict):
     3rd Win: 100 pts
     """
     await asyncio.sleep(0) 
-    pb.PokeSim.start()
+    return evaluate_genome(genome, config_data)
+
+
+def evaluate_genome(genome: PokemonGenome, config_data: dict) -> int:
+    """Synchronous body of evaluate_fitness, also run directly by worker processes."""
+    return record_matchup_results(genome, evaluate_matchups(genome, config_data), config_data)
+
+
+def record_matchup_results(genome: PokemonGenome, results, config_data: dict) -> int:
+    """Stores per-opponent results on the genome (None if it is invalid) and scores them with SCORE_PER_WIN."""
+    genome.matchup_results = results
+    genome.results_fingerprint = genome.fingerprint() if results is not None else None
+    return rescore(genome, config_data['SCORE_PER_WIN'])
+
+
+def rescore(genome: PokemonGenome, score_per_win) -> int:
+    """Recomputes the fitness from the stored per-opponent results, without battling."""
+    genome.fitness = score_matchups(genome.matchup_wins, score_per_win) if genome.matchup_results else 0
+    return genome.fitness
+
+
+def score_matchups(wins_by_opponent: dict, score_per_win) -> int:
+    """Diminishing returns per opponent: score_per_win[k] points for its (k+1)-th win (see config.SCORE_PER_WIN)."""
     total_score = 0
-    
-    global _MINIMAX_CONFIG_HACK
-    _MINIMAX_CONFIG_HACK = config_data
+    for wins in wins_by_opponent.values():
+        total_score += sum(score_per_win[:wins])
+    return total_score
+
+
+def reduce_battle_outcomes(outcomes) -> dict:
+    """
+    Folds (opponent info, battle result) pairs from individual battles into per-opponent
+    results {opponent name: {"opponent", "battles", "wins", "turns", "hp_margin"}}.
+    Turns and HP margin are means over the simulated battles (None if all were pre-filtered).
+    """
+    results = {}
+    for opponent_info, battle in outcomes:
+        result = results.get(opponent_info["name"])
+        if result is None:
+            result = results[opponent_info["name"]] = {
+                "opponent": opponent_signature(opponent_info), "battles": 0, "wins": 0,
+                "turns": [], "hp_margin": [],
+            }
+        result["battles"] += 1
+        result["wins"] += int(battle["won"])
+        if battle["turns"] is not None:
+            result["turns"].append(battle["turns"])
+            result["hp_margin"].append(battle["hp_margin"])
+    for result in results.values():
+        for key in ("turns", "hp_margin"):
+            values = result[key]
+            result[key] = sum(values) / len(values) if values else None
+    return results
+
+
+def pending_matchups(genome: PokemonGenome, opponents: list) -> tuple:
+    """
+    Splits the opponents between those the genome's stored results already cover
+    (same genes, same opponent set) and those it still has to battle.
+    Returns (stored results to keep, opponents to battle).
+    """
+    stored = genome.matchup_results
+    if not stored or genome.results_fingerprint != genome.fingerprint():
+        return {}, opponents
+    kept, remaining = {}, []
+    for index, opponent_info in opponents:
+        result = stored.get(opponent_info["name"])
+        if result is not None and result["opponent"] == opponent_signature(opponent_info):
+            kept[opponent_info["name"]] = result
+        else:
+            remaining.append((index, opponent_info))
+    return kept, remaining
+
+
+def matchup_opponents(genome: PokemonGenome, config_data: dict):
+    """
+    The gauntlet entries this genome is scored against, as (gauntlet index, opponent info),
+    or None if the genome cannot be built. Opponents with invalid data are left out.
+    Each of them is played BATTLES_PER_OPPONENT times; every (genome, opponent, battle index)
+    is an independent task that play_matchup can run on any worker.
+    """
+    ensure_simulator_started()
     
     # Always use the main GAUNTLET
     current_gauntlet = config_data['GAUNTLET']
-    t1_ai = get_best_move_minimax
-    t2_ai = get_best_move_minimax
     
     gauntlet_limit = config_data.get('GAUNTLET_SIZE')
     if gauntlet_limit and gauntlet_limit > 0:
         current_gauntlet = current_gauntlet[:gauntlet_limit]
 
     try:
-        # Dry run to check validity
-        _genome_to_sim_pokemon(genome)
+        # Built once per genome; doubles as the validity check
+        _get_genome_template(genome)
     except Exception as e:
         print(f"Invalid genome {genome.genome_id}, skipping. Error: {e}")
-        genome.fitness = 0
-        return 0
+        return None
 
-    # Battle Loop
-    for opponent_info in current_gauntlet:
+    opponents = []
+    for index, opponent_info in enumerate(current_gauntlet):
         try:
             # Validate opponent data
-            _gauntlet_to_sim_pokemon(opponent_info)
+            _get_opponent_template(opponent_info)
         except Exception as e:
             print(f"Invalid opponent data for {opponent_info['name']}, skipping.")
             continue
+        opponents.append((index, opponent_info))
+    return opponents
 
-        wins_against_this_opponent = 0
-        n_battles = 3
-        
-        for _ in range(n_battles):
-            our_pokemon = _genome_to_sim_pokemon(genome)
-            our_trainer = pb.Trainer("GenomeTrainer", [our_pokemon])
-            opponent_pokemon = _gauntlet_to_sim_pokemon(opponent_info)
-            opponent_trainer = pb.Trainer(opponent_info["name"], [opponent_pokemon])
-            
-            battle = pb.Battle(our_trainer, opponent_trainer)
-            battle.start()
-
-            while not battle.is_finished():
-                t1_move = t1_ai(battle, battle.t1, battle.t2)
-                t2_move = t2_ai(battle, battle.t2, battle.t1)
-                try:
-                    battle.turn(t1_move, t2_move)
-                except Exception:
-                    break 
-            
-            if battle.get_winner() == our_trainer:
-                wins_against_this_opponent += 1
-
-        # Apply Diminishing Returns Scoring
-        if wins_against_this_opponent >= 1:
-            total_score += 1000
-        if wins_against_this_opponent >= 2:
-            total_score += 250
-        if wins_against_this_opponent >= 3:
-            total_score += 100
-
-    genome.fitness = total_score
-    _MINIMAX_CONFIG_HACK = {}
-    return total_score
 
+def prefilter_matchups(genome: PokemonGenome, opponents: list, config_data: dict) -> tuple:
+    """
+    Resolves clearly decided matchups without running pb.Battle (MATCHUP_PREFILTER):
+    when matchup_filter.predict_matchup is at least MATCHUP_PREFILTER_CONFIDENCE sure,
+    all battles against that opponent count as its predicted result.
+    Returns (opponents still to battle, decided (opponent info, battle result) pairs, one per battle).
+    """
+    if not config_data.get('MATCHUP_PREFILTER'):
+        return opponents, []
+    threshold = config_data.get('MATCHUP_PREFILTER_CONFIDENCE', 0.95)
+    ours = _get_genome_template(genome)
+    remaining, decided = [], []
+    for index, opponent_info in opponents:
+        won, confidence = predict_matchup(ours, _get_opponent_template(opponent_info))
+        if confidence >= threshold:
+            decided.extend([(opponent_info, {"won": won, "turns": None, "hp_margin": None})]
+                           * BATTLES_PER_OPPONENT)
+        else:
+            remaining.append((index, opponent_info))
+    return remaining, decided
 
-def run_final_tournament(champions: list, config_data: dict) -> PokemonGenome:
-    """ Runs a round-robin tournament among the provided champions. """
-    print(f"\n--- Starting Final Tournament with {len(champions)} Champions ---")
-    if not champions:
-        print("No champions to run tournament with.")
+
+def evaluate_matchups(genome: PokemonGenome, config_data: dict):
+    """
+    Battles the genome against the gauntlet and returns its per-opponent results
+    (see reduce_battle_outcomes), or None if the genome cannot be built.
+    Opponents already covered by the genome's stored results are not battled again.
+    """
+    opponents = matchup_opponents(genome, config_data)
+    collect_stats = config_data.get('COLLECT_SEARCH_STATS', False)
+    genome.search_stats = SearchStats() if collect_stats else None
+    genome.battle_search_stats = []
+    genome.battle_replays = []
+    genome.prefiltered_battles = 0
+    if opponents is None:
         return None
 
-    pb.PokeSim.start()
+    results, opponents = pending_matchups(genome, opponents)
+    opponents, outcomes = prefilter_matchups(genome, opponents, config_data)
+    genome.prefiltered_battles = len(outcomes)
+    for _, opponent_info in opponents:
+        for battle_index in range(BATTLES_PER_OPPONENT):
+            battle, stats = play_matchup(genome, opponent_info, config_data, battle_index)
+            outcomes.append((opponent_info, battle))
+            keep_replay(genome, opponent_info, battle_index, battle)
+            if stats is not None:
+                genome.battle_search_stats.append((opponent_info["name"], stats))
+                genome.search_stats.merge(stats)
+    results.update(reduce_battle_outcomes(outcomes))
+    return results
+
+
+def print_battle_text(title: str, lines: list):
+    """
+    Prints a battle's full text under its title in one write. The GUI's log
+    (ui.TextRedirector.write_detail) can leave these out (GUI_LOG_LEVEL).
+    """
+    text = "\n".join(["", title, *lines]) + "\n"
+    getattr(sys.stdout, "write_detail", sys.stdout.write)(text)
+
+def play_matchup(genome: PokemonGenome, opponent_info: dict, config_data: dict, battle_index=0) -> tuple:
+    """
+    Plays one battle between the genome and one gauntlet opponent (minimax on both sides).
+    Returns ({"won", "turns", "hp_margin"}, SearchStats of the battle or None), where the
+    HP margin is our remaining HP fraction minus the opponent's. The battle index only
+    identifies the task: every battle of a matchup is independent.
+    Plays a silent SimBattle unless BATTLE_LOG asks for the battle text to be printed.
+    The battle draws its own seed and re-seeds the RNG before every turn (see
+    battle_replay), so with BATTLE_REPLAY_DIR the result also carries
+    "replay": (seed, one move byte per turn), enough to replay it exactly.
+    """
+    ensure_simulator_started()
+
+    our_pokemon = _clone_fresh_pokemon(_get_genome_template(genome))
+    our_trainer = pb.Trainer("GenomeTrainer", [our_pokemon])
+    opponent_pokemon = _clone_fresh_pokemon(_get_opponent_template(opponent_info))
+    opponent_trainer = pb.Trainer(opponent_info["name"], [opponent_pokemon])
     
-    global _MINIMAX_CONFIG_HACK
-    _MINIMAX_CONFIG_HACK = config_data
+    log = config_data.get('BATTLE_LOG', False)
+    moves = [] if config_data.get('BATTLE_REPLAY_DIR') else None
+    seed = random.getrandbits(32)
+
+    stats = None
+    if config_data.get('COLLECT_SEARCH_STATS', False):
+        stats = SearchStats()
+        stats.battles = 1
+    context = SearchContext.from_config(config_data, stats)
+
+    rng = simulator_rng()
+    state = rng.getstate()
+    try:
+        battle = (pb.Battle if log else SimBattle)(our_trainer, opponent_trainer)
+        rng.seed(turn_seed(seed, 0))
+        battle.start()
+        turn = 0
+        while not battle.is_finished():
+            t1_move = get_best_move_minimax(battle, battle.t1, battle.t2, context)
+            t2_move = get_best_move_minimax(battle, battle.t2, battle.t1, context)
+            if moves is not None:
+                moves.append(encode_turn(battle, t1_move, t2_move))
+            turn += 1
+            rng.seed(turn_seed(seed, turn))
+            try:
+                battle.turn(t1_move, t2_move)
+            except Exception:
+                break
+    finally:
+        rng.setstate(state)
+
+    if log:
+        print_battle_text(f"--- BATTLE: Genome {genome.genome_id} vs. {opponent_info['name']} (battle {battle_index + 1}) ---",
+                          battle.get_all_text())
+    result = {
+        "won": battle.get_winner() == our_trainer,
+        "turns": battle.turn_count,
+        "hp_margin": our_pokemon.cur_hp / our_pokemon.max_hp - opponent_pokemon.cur_hp / opponent_pokemon.max_hp,
+    }
+    if moves is not None:
+        result["replay"] = (seed, moves)
+    return result, stats
 
-    tournament_wins = {champ.genome_id: 0 for champ in champions}
 
-    for i in range(len(champions)):
-        for j in range(i + 1, len(champions)):
-            champ1_genome = champions[i]
-            champ2_genome = champions[j]
+def keep_replay(genome: PokemonGenome, opponent_info: dict, battle_index: int, battle: dict):
+    """Adds a battle played with BATTLE_REPLAY_DIR to the genome's battle_replays (written by battle_replay)."""
+    if battle.get("replay") is not None:
+        genome.battle_replays.append((opponent_info, battle_index, battle))
 
-            print(f"\n--- TOURNAMENT MATCH: {champ1_genome.name} (ID {champ1_genome.genome_id}) vs. {champ2_genome.name} (ID {champ2_genome.genome_id}) ---")
-            
-            champ1_poke = _genome_to_sim_pokemon(champ1_genome)
-            champ1_trainer = pb.Trainer(f"Champ_{champ1_genome.genome_id}", [champ1_poke])
-            champ2_poke = _genome_to_sim_pokemon(champ2_genome)
-            champ2_trainer = pb.Trainer(f"Champ_{champ2_genome.genome_id}", [champ2_poke])
-            
-            battle = pb.Battle(champ1_trainer, champ2_trainer)
-            battle.start()
-            for line in battle.get_cur_text(): print(line)
-
-            turn_count = 0
-            while not battle.is_finished():
-                turn_count += 1
-                print(f"--- Turn {turn_count} ---")
-                
-                t1_move = get_best_move_minimax(battle, battle.t1, battle.t2)
-                t2_move = get_best_move_minimax(battle, battle.t2, battle.t1)
-                
-                try:
-                    battle.turn(t1_move, t2_move)
-                    for line in battle.get_cur_text():
-                        print(line)
-                except Exception as e:
-                    print(f"Error during tournament turn: {e}. Ending battle.")
-                    break 
-
-            winner = battle.get_winner()
-            if winner == champ1_trainer:
-                print(f"--- MATCH WINNER: {champ1_genome.name} (ID {champ1_genome.genome_id}) ---")
-                tournament_wins[champ1_genome.genome_id] += 1
-            elif winner == champ2_trainer:
-                print(f"--- MATCH WINNER: {champ2_genome.name} (ID {champ2_genome.genome_id}) ---")
-                tournament_wins[champ2_genome.genome_id] += 1
-            else:
-                print("--- MATCH END: DRAW ---")
-
-    print("\n--- TOURNAMENT COMPLETE ---")
-    print("Final Standings (Wins):")
-    
-    best_genome_id = -1
-    max_wins = -1
-    for genome_id, wins in tournament_wins.items():
-        print(f"Genome {genome_id}: {wins} wins")
-        if wins > max_wins:
-            max_wins = wins
-            best_genome_id = genome_id
-            
-    ultimate_winner = next((g for g in champions if g.genome_id == best_genome_id), None)
-    
-    if ultimate_winner:
-        print(f"\n--- ULTIMATE CHAMPION (ID {ultimate_winner.genome_id}) ---")
-        print(str(ultimate_winner))
-    
-    _MINIMAX_CONFIG_HACK = {}
-    return ultimate_winner
\ No newline at end of file
+
+def play_tournament_game(champ1: PokemonGenome, champ2: PokemonGenome, config_data: dict,
+                         seed: int, record=False) -> tuple:
+    """
+    One final-tournament game between two champions (minimax on both sides), champ1 as trainer 1.
+    Runs on its own RNG stream seeded with `seed`, so a game gives the same result on any worker.
+    Uses the silent SimBattle unless `record` asks for the battle text (replay log).
+    Returns (winner: 1, 2 or None for a draw, turns, list of text lines or None).
+    """
+    ensure_simulator_started()
+    context = SearchContext.from_config(config_data)
+    rng = simulator_rng()
+    state = rng.getstate()
+    rng.seed(seed)
+    try:
+        trainer1 = pb.Trainer(f"Champ_{champ1.genome_id}", [_clone_fresh_pokemon(_get_genome_template(champ1))])
+        trainer2 = pb.Trainer(f"Champ_{champ2.genome_id}", [_clone_fresh_pokemon(_get_genome_template(champ2))])
+        battle = (pb.Battle if record else SimBattle)(trainer1, trainer2)
+        battle.start()
+        while not battle.is_finished():
+            t1_move = get_best_move_minimax(battle, battle.t1, battle.t2, context)
+            t2_move = get_best_move_minimax(battle, battle.t2, battle.t1, context)
+            try:
+                battle.turn(t1_move, t2_move)
+            except Exception as e:
+                battle.add_text(f"Error during tournament turn: {e}. Ending battle.")
+                break
+    finally:
+        rng.setstate(state)
+
+    winner = battle.get_winner()
+    winner = 1 if winner == trainer1 else 2 if winner == trainer2 else None
+    return winner, battle.turn_count, battle.get_all_text() if record else None
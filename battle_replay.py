@@ -0,0 +1,209 @@
+"""
+Compact binary record of gauntlet battles, and a replayer that rebuilds them.
+
+Every gauntlet battle runs on its own seed, and the simulator's RNG is
+re-seeded from it before each turn (turn_seed), so the minimax searches in
+between do not change what a turn does. A battle is then fully described by
+its two Pokémon, its seed and the moves chosen each turn. With
+BATTLE_REPLAY_DIR set, the moves are kept while evaluating (one byte per turn)
+and every generation's battles are appended to BATTLE_REPLAY_DIR/gen_XXX.bin.
+Replaying feeds the recorded moves to a text-logging pb.Battle, without any
+search, to get the full battle text of a surprising fitness:
+
+    python battle_replay.py replays/gen_003.bin                 # list the battles
+    python battle_replay.py replays/gen_003.bin --genome 41     # replay a genome's battles
+    python battle_replay.py replays/gen_003.bin --genome 41 --opponent Garchomp --battle 2
+
+A file is a sequence of records: 1 type byte, a 4-byte little-endian payload
+length, the payload. Every appended batch starts with a header record, then
+one genome record ("G": genome id + to_dict() JSON) per genome and one opponent
+record ("O": gauntlet entry JSON) per opponent, then one battle record per
+battle ("B", see BATTLE_RECORD). A battle refers to the last genome record
+with its id and the last opponent record with its name, so files stay valid
+when batches from several runs or islands are appended to them.
+"""
+import os
+import sys
+import json
+import struct
+import argparse
+
+MAGIC = b"MWR1"
+_RECORD = struct.Struct("<cI")
+# genome id, battle index, seed, won, turn count, opponent name length;
+# followed by the opponent name and one move byte per turn
+BATTLE_RECORD = struct.Struct("<iBI?HB")
+# Move byte nibble for an action that is not one of the Pokémon's moves (struggle)
+STRUGGLE = 0xF
+
+
+def turn_seed(seed: int, turn: int) -> int:
+    """RNG seed of one turn of a battle (turn 0 is battle.start())."""
+    return (seed << 16) | turn
+
+
+def _move_code(pokemon, action) -> int:
+    for i, move in enumerate(pokemon.moves):
+        if move.name == action[1]:
+            return i
+    return STRUGGLE
+
+
+def encode_turn(battle, t1_move, t2_move) -> int:
+    """Both sides' moves of a turn in one byte: index in the moveset of trainer 1 (high nibble) and 2."""
+    return (_move_code(battle.t1.current_poke, t1_move) << 4) | _move_code(battle.t2.current_poke, t2_move)
+
+
+def decode_turn(battle, code: int) -> tuple:
+    moves = []
+    for pokemon, index in ((battle.t1.current_poke, code >> 4), (battle.t2.current_poke, code & 0xF)):
+        moves.append(['move', 'struggle' if index == STRUGGLE else pokemon.moves[index].name])
+    return moves
+
+
+def _record(kind: bytes, payload: bytes) -> bytes:
+    return _RECORD.pack(kind, len(payload)) + payload
+
+
+def write_replays(path: str, genomes) -> int:
+    """
+    Appends the recorded battles of the genomes (genome.battle_replays) to the
+    file as one batch, and clears them. Returns the number of battles written.
+    """
+    chunks = [_record(b"H", MAGIC)]
+    opponents = {}
+    battles = 0
+    for genome in genomes:
+        if not genome.battle_replays:
+            continue
+        genome_data = json.dumps(genome.to_dict(), separators=(",", ":")).encode("utf-8")
+        chunks.append(_record(b"G", struct.pack("<i", genome.genome_id) + genome_data))
+        for opponent_info, battle_index, battle in genome.battle_replays:
+            name = opponent_info["name"].encode("utf-8")
+            if name not in opponents:
+                opponents[name] = True
+                chunks.append(_record(b"O", json.dumps(opponent_info, separators=(",", ":")).encode("utf-8")))
+            seed, moves = battle["replay"]
+            chunks.append(_record(b"B", BATTLE_RECORD.pack(
+                genome.genome_id, battle_index, seed, battle["won"], battle["turns"], len(name)
+            ) + name + bytes(moves)))
+            battles += 1
+        genome.battle_replays = []
+    if battles:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "ab") as f:
+            f.write(b"".join(chunks))  # One write per batch, so concurrent appends do not interleave
+    return battles
+
+
+def read_replays(path: str) -> list:
+    """
+    The battles of a replay file, in file order, as dicts with "genome" (to_dict()
+    data), "opponent" (gauntlet entry), "battle" (index), "seed", "won", "turns"
+    and "moves" (bytes).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    genomes, opponents, battles = {}, {}, []
+    position = 0
+    while position < len(data):
+        kind, length = _RECORD.unpack_from(data, position)
+        position += _RECORD.size
+        payload = data[position:position + length]
+        position += length
+        if len(payload) < length:
+            raise ValueError(f"{path}: truncated record at byte {position - length}")
+        if kind == b"H":
+            if payload != MAGIC:
+                raise ValueError(f"{path}: not a battle replay file (or an unsupported version)")
+        elif kind == b"G":
+            genomes[struct.unpack_from("<i", payload)[0]] = json.loads(payload[4:])
+        elif kind == b"O":
+            opponent_info = json.loads(payload)
+            opponents[opponent_info["name"]] = opponent_info
+        elif kind == b"B":
+            genome_id, battle_index, seed, won, turns, name_length = BATTLE_RECORD.unpack_from(payload)
+            name_end = BATTLE_RECORD.size + name_length
+            battles.append({
+                "genome": genomes[genome_id],
+                "opponent": opponents[payload[BATTLE_RECORD.size:name_end].decode("utf-8")],
+                "battle": battle_index, "seed": seed, "won": won, "turns": turns,
+                "moves": payload[name_end:],
+            })
+        else:
+            raise ValueError(f"{path}: unknown record type {kind!r}")
+    return battles
+
+
+def replay_battle(record: dict, config_data: dict) -> tuple:
+    """
+    Rebuilds a recorded battle with a text-logging pb.Battle, feeding it the
+    recorded moves instead of searching. Returns ({"won", "turns", "hp_margin"}, text lines).
+    """
+    import poke_battle_sim as pb
+    from pokemon_genome import PokemonGenome
+    from battle_evaluator import _clone_fresh_pokemon, _get_genome_template, _get_opponent_template
+    from sim_runtime import ensure_simulator_started, simulator_rng
+
+    ensure_simulator_started()
+    genome = PokemonGenome.from_dict(record["genome"], config_data)
+    our_pokemon = _clone_fresh_pokemon(_get_genome_template(genome))
+    our_trainer = pb.Trainer("GenomeTrainer", [our_pokemon])
+    opponent_pokemon = _clone_fresh_pokemon(_get_opponent_template(record["opponent"]))
+    opponent_trainer = pb.Trainer(record["opponent"]["name"], [opponent_pokemon])
+
+    rng = simulator_rng()
+    state = rng.getstate()
+    try:
+        battle = pb.Battle(our_trainer, opponent_trainer)
+        rng.seed(turn_seed(record["seed"], 0))
+        battle.start()
+        for turn, code in enumerate(record["moves"], start=1):
+            t1_move, t2_move = decode_turn(battle, code)
+            rng.seed(turn_seed(record["seed"], turn))
+            try:
+                battle.turn(t1_move, t2_move)
+            except Exception as e:
+                battle.add_text(f"Error during turn: {e}. Ending battle.")
+                break
+    finally:
+        rng.setstate(state)
+
+    result = {
+        "won": battle.get_winner() == our_trainer,
+        "turns": battle.turn_count,
+        "hp_margin": our_pokemon.cur_hp / our_pokemon.max_hp - opponent_pokemon.cur_hp / opponent_pokemon.max_hp,
+    }
+    return result, battle.get_all_text()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lists or replays the battles of a BATTLE_REPLAY_DIR file.")
+    parser.add_argument("path", help="Replay file, e.g. replays/gen_003.bin.")
+    parser.add_argument("--genome", type=int, help="Replay the battles of this genome id.")
+    parser.add_argument("--opponent", help="Only battles against this gauntlet opponent.")
+    parser.add_argument("--battle", type=int, help="Only this battle (1-based) of each matchup.")
+    args = parser.parse_args()
+
+    records = read_replays(args.path)
+    if args.genome is None:
+        for r in records:
+            print(f"Genome {r['genome']['genome_id']} ({r['genome']['name']}) vs. {r['opponent']['name']} "
+                  f"battle {r['battle'] + 1}: {'won' if r['won'] else 'lost'} in {r['turns']} turns")
+        print(f"{len(records)} battles.")
+        sys.exit(0)
+
+    import config
+    config_data = {k: getattr(config, k) for k in dir(config) if k.isupper()}
+    selected = [r for r in records if r["genome"]["genome_id"] == args.genome
+                and (args.opponent is None or r["opponent"]["name"].lower() == args.opponent.lower())
+                and (args.battle is None or r["battle"] == args.battle - 1)]
+    if not selected:
+        sys.exit(f"No recorded battles match in {args.path}.")
+    for r in selected:
+        result, text = replay_battle(r, config_data)
+        print(f"\n--- REPLAY: Genome {args.genome} vs. {r['opponent']['name']} (battle {r['battle'] + 1}) ---")
+        for line in text: print(line)
+        if (result["won"], result["turns"]) != (r["won"], r["turns"]):
+            print(f"WARNING: the replay ended differently from the recorded battle "
+                  f"({'won' if r['won'] else 'lost'} in {r['turns']} turns).")
@@ -0,0 +1,74 @@
+"""
+Measures the cost of building battle text in evaluation battles.
+
+Plays the same gauntlet battles (same genomes, opponents and random seeds) with
+the text-logging pb.Battle (BATTLE_LOG = True) and with the silent SimBattle,
+and reports the time per battle for each. Run from the repository root:
+
+    python benchmarks/battle_text_overhead.py [--battles 60] [--depth 1]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from pokemon_data import POKEMON_DATABASE
+from pokemon_genome import PokemonGenome
+from battle_evaluator import play_matchup
+from sim_runtime import ensure_simulator_started
+
+
+def _play(cases: list, config_data: dict) -> tuple:
+    """Plays every (genome, opponent, seed) case; returns (seconds, results)."""
+    results = []
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for genome, opponent_info, seed in cases:
+            random.seed(seed)
+            results.append(play_matchup(genome, opponent_info, config_data)[0])
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--battles", type=int, default=60, help="Battles per mode.")
+    parser.add_argument("--depth", type=int, default=1, help="MINIMAX_DEPTH of both sides.")
+    parser.add_argument("--species", default="lucario", help="Species of the evaluated genomes.")
+    args = parser.parse_args()
+
+    ensure_simulator_started()
+    config_data = {k: getattr(config, k) for k in dir(config) if k.isupper()}
+    config_data.update(MINIMAX_DEPTH=args.depth, COLLECT_SEARCH_STATS=False)
+    base = dict(POKEMON_DATABASE[args.species], name=args.species)
+
+    rng = random.Random(0)
+    cases = []
+    while len(cases) < args.battles:
+        genome = PokemonGenome(base, config_data)
+        opponent_info = config_data["GAUNTLET"][len(cases) % len(config_data["GAUNTLET"])]
+        try:
+            play_matchup(genome, opponent_info, config_data)
+        except Exception:
+            continue  # Genes the simulator cannot build
+        cases.append((genome, opponent_info, rng.getrandbits(32)))
+
+    silent_time, silent = _play(cases, dict(config_data, BATTLE_LOG=False))
+    logged_time, logged = _play(cases, dict(config_data, BATTLE_LOG=True))
+    turns = sum(r["turns"] for r in silent)
+    same = sum(a == b for a, b in zip(silent, logged))
+
+    print(f"{len(cases)} battles, {turns} turns, minimax depth {args.depth}")
+    print(f"pb.Battle (BATTLE_LOG):  {logged_time / len(cases) * 1000:8.2f} ms/battle")
+    print(f"SimBattle (default):     {silent_time / len(cases) * 1000:8.2f} ms/battle")
+    print(f"Saved: {(logged_time - silent_time) / len(cases) * 1000:.2f} ms/battle "
+          f"({(1 - silent_time / logged_time) * 100:.1f}%)")
+    print(f"Identical outcomes: {same}/{len(cases)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the scaling of the "thread" and "process" evaluation backends.
+
+Evaluates the same population with ThreadEvaluationPool and EvaluationPool at
+several worker counts and reports genomes per second and the speedup over one
+worker. Threads only scale on a free-threaded interpreter with the GIL disabled
+(e.g. `python3.13t -X gil=0`); with the GIL they show the cost of taking turns.
+Run from the repository root:
+
+    python benchmarks/thread_vs_process.py [--genomes 32] [--workers 1 2 4 8]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from pokemon_data import POKEMON_DATABASE
+from pokemon_genome import PokemonGenome
+from evaluation_pool import EvaluationPool, ThreadEvaluationPool
+from genome_validation import GenomeWhitelist
+from sim_runtime import ensure_simulator_started, gil_disabled
+
+
+async def _evaluate_all(pool, genomes: list, config_data: dict):
+    await asyncio.gather(*(pool.evaluate(genome, config_data) for genome in genomes))
+
+
+def _time_backend(pool_class, workers: int, genomes: list, config_data: dict) -> float:
+    pool = pool_class(workers, config_data)
+    try:
+        for genome in genomes:
+            genome.clear_results()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            asyncio.run(_evaluate_all(pool, genomes, config_data))
+        return time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--genomes", type=int, default=32, help="Genomes evaluated per measurement.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to measure.")
+    parser.add_argument("--depth", type=int, default=1, help="MINIMAX_DEPTH of both sides.")
+    parser.add_argument("--granularity", default="battle", choices=("battle", "genome"), help="TASK_GRANULARITY.")
+    parser.add_argument("--species", default="lucario", help="Species of the evaluated genomes.")
+    args = parser.parse_args()
+
+    ensure_simulator_started()
+    config_data = {k: getattr(config, k) for k in dir(config) if k.isupper()}
+    config_data.update(MINIMAX_DEPTH=args.depth, TASK_GRANULARITY=args.granularity,
+                       COLLECT_SEARCH_STATS=False, MATCHUP_PREFILTER=False, BATTLE_REPLAY_DIR=None)
+    base = dict(POKEMON_DATABASE[args.species], name=args.species)
+    whitelist = GenomeWhitelist(base, config_data)
+    genomes = [PokemonGenome(base, config_data, whitelist=whitelist) for _ in range(args.genomes)]
+
+    print(f"Python {sys.version.split()[0]}, GIL {'disabled' if gil_disabled() else 'enabled'}, "
+          f"{os.cpu_count()} CPUs, {args.genomes} genomes, depth {args.depth}, {args.granularity} tasks")
+    print(f"{'workers':>7} | {'thread genomes/s':>16} {'speedup':>7} | {'process genomes/s':>17} {'speedup':>7}")
+    base_rates = {}
+    for workers in args.workers:
+        row = [f"{workers:>7}"]
+        for name, pool_class in (("thread", ThreadEvaluationPool), ("process", EvaluationPool)):
+            rate = args.genomes / _time_backend(pool_class, workers, genomes, config_data)
+            base_rates.setdefault(name, rate)
+            width = 16 if name == "thread" else 17
+            row.append(f"{rate:>{width}.1f} {rate / base_rates[name]:>6.2f}x")
+        print(" | ".join(row))
+
+
+if __name__ == "__main__":
+    main()
@@ -103,6 +103,142 @@ ELITISM_COUNT = 1
 # **Lower Value**: Safer, runs fewer things at once.
 MAX_CONCURRENT_EVALUATIONS = 8
 
+# Where fitness evaluations run.
+# "async": inside the main process, one at a time on the event loop.
+# "process": in MAX_CONCURRENT_EVALUATIONS worker processes (uses every core).
+# "thread": in MAX_CONCURRENT_EVALUATIONS threads sharing this process's memory.
+# Only parallel on a free-threaded Python build (3.13t+) running without the GIL,
+# where "process" switches to it automatically.
+# "distributed": on remote workers (`python distributed_eval.py --host ... --port ...`)
+# connected over TCP; MAX_CONCURRENT_EVALUATIONS should be at least the number of workers.
+EVALUATION_BACKEND = "async"
+
+# Unit of work sent to "process" and "distributed" workers.
+# "battle": every (genome, opponent, battle) is its own task, so a genome's
+# 20 x 3 battles spread over all workers and slow genomes cannot hold up one core.
+# "genome": a whole gauntlet per task (fewer, larger messages).
+TASK_GRANULARITY = "battle"
+
+# Keeps the "process"/"thread" worker pool running after a run instead of
+# starting a new one for every run and tournament round. Its workers keep the
+# simulator tables and built gauntlet/genome templates warm, and are reused by
+# the final tournament and by later runs with the same settings (the app
+# restarts them only when the settings change).
+PERSISTENT_WORKERS = True
+
+# Distributed evaluation. The coordinator listens on DISTRIBUTED_HOST:DISTRIBUTED_PORT
+# ("0.0.0.0" to accept workers from other machines). DISTRIBUTED_LOCAL_WORKERS also
+# starts that many workers on this machine. A worker that sends no heartbeat for
+# HEARTBEAT_TIMEOUT seconds is dropped and its genome is given to another worker.
+# While tasks wait with no worker connected the coordinator keeps printing a
+# warning, and after DISTRIBUTED_CONNECT_TIMEOUT seconds it fails the run
+# (None: wait for workers forever).
+DISTRIBUTED_HOST = "127.0.0.1"
+DISTRIBUTED_PORT = 8765
+DISTRIBUTED_LOCAL_WORKERS = 0
+HEARTBEAT_TIMEOUT = 10.0
+DISTRIBUTED_CONNECT_TIMEOUT = 300.0
+
+# "generational": evaluate the whole population, then speciate and reproduce.
+# "steady_state": workers continuously evaluate new offspring; each result is
+# speciated as soon as it arrives and replaces the weakest genome, so no worker
+# waits for the slowest genome of a generation. Best with EVALUATION_BACKEND = "process".
+EVOLUTION_MODE = "generational"
+
+# Island model. With ISLAND_COUNT > 1 the population is split into that many
+# independent populations, each evolving in its own process (one core each),
+# which exchange their MIGRATION_SIZE best genomes with the next island in a
+# ring every MIGRATION_INTERVAL generations.
+# **Higher ISLAND_COUNT**: Smaller, faster islands and more diversity.
+# **Lower MIGRATION_INTERVAL**: Good genes spread faster, islands converge sooner.
+ISLAND_COUNT = 1
+MIGRATION_INTERVAL = 5
+MIGRATION_SIZE = 2
+
+# Surrogate pre-screening of offspring. A ridge regression trained during the
+# run on genome features and per-opponent results predicts each child's fitness;
+# about 1 / SURROGATE_SCREEN_FRACTION candidates are bred per slot and only the
+# most promising ones are evaluated with real battles. Screening starts once
+# SURROGATE_MIN_SAMPLES genomes have been evaluated.
+# **Lower SURROGATE_SCREEN_FRACTION**: Stronger filtering, more trust in the model.
+SURROGATE_SCREENING = False
+SURROGATE_SCREEN_FRACTION = 0.5
+SURROGATE_MIN_SAMPLES = 50
+
+# Analytical matchup pre-filter. Before battling an opponent, a closed-form
+# damage calculation (guaranteed one-hit KOs, type/ability immunities, turns to
+# KO) predicts the winner; when it is at least MATCHUP_PREFILTER_CONFIDENCE sure,
+# the battles against that opponent are skipped and counted as predicted.
+# **Lower MATCHUP_PREFILTER_CONFIDENCE**: More battles skipped, noisier fitness.
+MATCHUP_PREFILTER = False
+MATCHUP_PREFILTER_CONFIDENCE = 0.95
+
+# Every genome stores its results per opponent (wins, mean turns, mean HP
+# margin) and its fitness is computed from them, so only opponents without a
+# stored result are battled (e.g. after extending GAUNTLET).
+# **True**: Elites and migrants battle the whole gauntlet again every generation.
+# **False**: They keep their results and only battle new opponents (faster, but
+# a lucky elite keeps its lucky score). Incremental reuse of stored results
+# (only battling new opponents) happens only with REEVALUATE_ELITES = False.
+REEVALUATE_ELITES = True
+
+# Points for the 1st, 2nd and 3rd win against the same gauntlet opponent
+# (diminishing returns). The fitness is computed from the stored results, so
+# changing this rescores genomes without battling again.
+SCORE_PER_WIN = [1000, 250, 100]
+
+# Records and prints the full text of every gauntlet battle (debugging only: very
+# verbose, and slower since every battle event builds its message string).
+BATTLE_LOG = False
+# Directory for compact binary battle records (seed + chosen moves, a few dozen
+# bytes per battle), appended to one gen_XXX.bin file per generation. Replay one
+# with `python battle_replay.py <file> --genome <id>` to get its full text.
+# None disables recording.
+BATTLE_REPLAY_DIR = None
+
+# Final tournament. Every pair of species champions plays this many games
+# (alternating sides), spread over MAX_CONCURRENT_EVALUATIONS workers with any
+# EVALUATION_BACKEND: the running session pool, or else a pool started for them.
+# **Higher Value**: Less luck in picking the Ultimate Champion, longer tournament.
+TOURNAMENT_GAMES_PER_PAIRING = 3
+# Records and prints the full battle text of every tournament game (slower).
+TOURNAMENT_REPLAY_LOG = False
+# "round_robin": every champion plays every other one (O(n^2) pairings).
+# "swiss": SWISS_ROUNDS rounds (None = ceil(log2(champions))) pairing champions
+# of similar Elo rating, O(n log n) pairings for large champion pools.
+TOURNAMENT_MODE = "round_robin"
+SWISS_ROUNDS = None
+# Swiss mode only: JSON file that keeps the Elo ratings and genes of every
+# champion, so champions of later runs are ranked against earlier ones
+# without replaying old games. None: ratings are not kept.
+TOURNAMENT_RATINGS_FILE = None
+
+# GUI log. Output is buffered line by line without making the evolution thread
+# wait for the UI, and drawn in batches. Both the buffer and the log keep only
+# their last GUI_LOG_MAX_LINES lines.
+# GUI_LOG_LEVEL "detail" also shows the full text of battles and tournament
+# games (BATTLE_LOG, TOURNAMENT_REPLAY_LOG); "info" leaves that text out.
+GUI_LOG_LEVEL = "detail"
+GUI_LOG_MAX_LINES = 5000
+
+# Collects minimax search statistics (nodes expanded, leaf evaluations,
+# alpha-beta cutoffs, simulated turns that raised, time per depth) for every
+# battle, and aggregates them per genome and per generation.
+# **False**: No collection; the search only pays for a None check per node.
+COLLECT_SEARCH_STATS = False
+
+# Prints a per-generation breakdown of where the time goes (evaluation,
+# speciation, fitness sharing, offspring allocation, bookkeeping,
+# reproduction, deepcopies) and stores it in the history records.
+LOG_PHASE_TIMINGS = False
+
+# Optional built-in profiler, one output file per generation.
+# None: disabled. "cprofile": deterministic cProfile (`gen_XXX.prof`, open
+# with pstats/snakeviz). "sampling": low-overhead stack sampler
+# (`gen_XXX.folded`, open with flamegraph.pl or speedscope).
+PROFILE_MODE = None
+PROFILE_OUTPUT_DIR = "profiles"
+
 # Controls how many opponents from the gauntlet list are battled.
 # 10 = Battle first 10 opponents (Faster).
 # 20 = Battle all (Slower, more accurate).
@@ -137,6 +273,11 @@ MOVE_POOL = [
     "substitute", "leech-seed", "sleep-powder", "stun-spore"
 ]
 
+# Custom genomes always draw their moves from MOVE_POOL. If True, a standard
+# species only draws the moves of its learnset that are also in MOVE_POOL
+# (e.g. to keep it to the same competitive moves); if False, its whole learnset.
+RESTRICT_LEARNSET_TO_MOVE_POOL = False
+
 # missing "Fairy" type added in later generations
 POKEMON_TYPES = [
     "normal", "fire", "water", "grass", "electric", "ice", "fighting",
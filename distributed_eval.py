@@ -0,0 +1,382 @@
+"""
+Distributed fitness evaluation over plain TCP.
+
+The coordinator runs inside EvolutionaryAlgorithm.run (EVALUATION_BACKEND =
+"distributed") and listens on DISTRIBUTED_HOST:DISTRIBUTED_PORT. Workers on any
+host connect to it with
+
+    python distributed_eval.py --host <coordinator> --port <port>
+
+Every message is a 4-byte big-endian length followed by a UTF-8 JSON object:
+    coordinator -> worker  {"type": "config", "fingerprint", "config"}
+                           {"type": "task", "task", "fingerprint", "genome"[, "opponent", "battle"]}
+    worker -> coordinator  {"type": "ready", "fingerprint"}
+                           {"type": "heartbeat"}  (every HEARTBEAT_INTERVAL while busy)
+                           {"type": "result", "task", "results": {opponent: result}, "prefiltered", "replays",
+                            "search_stats", "battle_search_stats": [[opponent, stats]]}  (whole genome)
+                           {"type": "result", "task", "battle": {"won", "turns", "hp_margin"[, "replay"]}, "search_stats"}  (one battle)
+                           {"type": "error", "task", "reason"}
+The fingerprint is a hash of the evaluation-relevant config (gauntlet, search
+depth, gene pools), so a worker never scores a genome against a different
+gauntlet. With TASK_GRANULARITY = "battle" a task is one (genome, gauntlet
+index, battle index) battle, otherwise a whole genome. A task whose worker disconnects or misses heartbeats for
+HEARTBEAT_TIMEOUT seconds is put back in the queue for another worker; so is
+a task a worker answers with an error, once, after which evaluate() raises.
+Search stats travel as SearchStats.as_dict() (None unless COLLECT_SEARCH_STATS).
+"""
+import sys
+import json
+import struct
+import socket
+import asyncio
+import hashlib
+import argparse
+import itertools
+import threading
+import multiprocessing
+
+from pokemon_genome import PokemonGenome
+from search_stats import SearchStats
+from battle_evaluator import (
+    evaluate_matchups, keep_replay, matchup_opponents, pending_matchups, prefilter_matchups, play_matchup,
+    record_matchup_results, reduce_battle_outcomes, BATTLES_PER_OPPONENT,
+)
+from sim_runtime import ensure_simulator_started
+
+# Config keys a worker needs to evaluate a genome exactly like the coordinator would
+EVALUATION_KEYS = (
+    "GAUNTLET", "GAUNTLET_SIZE", "MINIMAX_DEPTH", "MOVE_POOL", "POKEMON_TYPES",
+    "NATURES", "ABILITY_POOL", "MAX_EVS", "MAX_BASE_STATS",
+    "MATCHUP_PREFILTER", "MATCHUP_PREFILTER_CONFIDENCE", "BATTLE_REPLAY_DIR",
+    "COLLECT_SEARCH_STATS", "BATTLE_LOG",
+)
+HEARTBEAT_INTERVAL = 2.0
+HEARTBEAT_TIMEOUT = 10.0
+CONNECT_TIMEOUT = 300.0
+# Workers that may answer a task with an error before its genome's evaluation fails
+TASK_ATTEMPTS = 2
+
+_LENGTH = struct.Struct(">I")
+
+
+def evaluation_config(config_data: dict) -> dict:
+    return {key: config_data[key] for key in EVALUATION_KEYS if key in config_data}
+
+
+def config_fingerprint(evaluation_config_data: dict) -> str:
+    canonical = json.dumps(evaluation_config_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _stats_data(stats):
+    return stats.as_dict() if stats is not None else None
+
+
+def _stats(data):
+    return SearchStats.from_dict(data) if data is not None else None
+
+
+def _encode(message: dict) -> bytes:
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _LENGTH.pack(len(payload)) + payload
+
+
+async def _read_message(reader) -> dict:
+    header = await reader.readexactly(_LENGTH.size)
+    payload = await reader.readexactly(_LENGTH.unpack(header)[0])
+    return json.loads(payload)
+
+
+class Coordinator:
+    """
+    Evaluation backend that hands genomes to remote workers.
+    `evaluate(genome)` queues the genome's tasks (one per battle, or one for the
+    whole gauntlet) and scores the returned results locally with score_matchups.
+    """
+    def __init__(self, config_data: dict):
+        self.config_data = config_data              # Scoring (SCORE_PER_WIN) stays on the coordinator
+        self.config = evaluation_config(config_data)
+        self.granularity = config_data.get('TASK_GRANULARITY', "battle")
+        self.fingerprint = config_fingerprint(self.config)
+        self.host = config_data.get('DISTRIBUTED_HOST', "127.0.0.1")
+        self.port = config_data.get('DISTRIBUTED_PORT', 8765)
+        self.local_worker_count = config_data.get('DISTRIBUTED_LOCAL_WORKERS', 0)
+        self.heartbeat_timeout = config_data.get('HEARTBEAT_TIMEOUT', HEARTBEAT_TIMEOUT)
+        self.connect_timeout = config_data.get('DISTRIBUTED_CONNECT_TIMEOUT', CONNECT_TIMEOUT)
+        self.server = None
+        self.tasks = None       # asyncio.Queue of task messages, created on the running loop
+        self.futures = {}       # task id -> future of its results
+        self.failed_on = {}     # task id -> names of the workers that answered it with an error
+        self.task_ids = itertools.count()
+        self.writers = set()
+        self.connected = 0      # Workers that passed the config handshake
+        self.watchdog = None
+        self.local_workers = []
+        self.redispatched = 0
+        self._start_lock = None
+
+    async def start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.server:
+                return
+            self.tasks = asyncio.Queue()
+            self.server = await asyncio.start_server(self._handle_worker, self.host, self.port)
+            print(f"Coordinator listening on {self.host}:{self.port} (config {self.fingerprint[:12]}).")
+            self.watchdog = asyncio.create_task(self._watch_workers())
+            if self.local_worker_count:
+                self._start_local_workers()
+
+    async def _watch_workers(self):
+        """
+        Warns while tasks wait with no worker connected, and fails them once
+        none has been for DISTRIBUTED_CONNECT_TIMEOUT seconds, instead of
+        letting the run wait forever.
+        """
+        waited = 0.0
+        while True:
+            await asyncio.sleep(self.heartbeat_timeout)
+            pending = [future for future in self.futures.values() if not future.done()]
+            if self.connected or not pending:
+                waited = 0.0
+                continue
+            waited += self.heartbeat_timeout
+            if self.connect_timeout is not None and waited >= self.connect_timeout:
+                error = RuntimeError(
+                    f"No evaluation worker connected to {self.host}:{self.port} for {waited:.0f}s "
+                    f"(start one with `python distributed_eval.py --host <coordinator> --port {self.port}`)."
+                )
+                for future in pending:
+                    future.set_exception(error)
+                waited = 0.0
+            else:
+                print(f"WARNING: {len(pending)} tasks waiting, but no evaluation worker is connected "
+                      f"to {self.host}:{self.port} ({waited:.0f}s).")
+
+    def _start_local_workers(self):
+        """Worker processes on this machine, connected through the same TCP protocol."""
+        host = "127.0.0.1" if self.host in ("0.0.0.0", "") else self.host
+        context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+        for _ in range(self.local_worker_count):
+            process = context.Process(target=run_worker, args=(host, self.port), daemon=True)
+            process.start()
+            self.local_workers.append(process)
+        print(f"Started {self.local_worker_count} local evaluation workers.")
+
+    async def _run_task(self, fields: dict):
+        """Queues one task and returns the worker's result message (raises if TASK_ATTEMPTS workers failed it)."""
+        await self.start()
+        task_id = next(self.task_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.futures[task_id] = future
+        await self.tasks.put({"type": "task", "task": task_id, "fingerprint": self.fingerprint, **fields})
+        try:
+            return await future
+        finally:
+            del self.futures[task_id]
+            self.failed_on.pop(task_id, None)
+
+    async def evaluate(self, genome) -> int:
+        genome.battle_replays = []
+        genome.search_stats = None
+        genome.battle_search_stats = []
+        if self.granularity == "battle":
+            if self.config.get('COLLECT_SEARCH_STATS', False):
+                genome.search_stats = SearchStats()
+            results = None
+            genome.prefiltered_battles = 0
+            opponents = matchup_opponents(genome, self.config)
+            if opponents is not None:
+                results, opponents = pending_matchups(genome, opponents)
+                opponents, decided = prefilter_matchups(genome, opponents, self.config)
+                genome.prefiltered_battles = len(decided)
+                genome_data = genome.to_dict()
+                pairs = [(info, {"genome": genome_data, "opponent": index, "battle": battle_index})
+                         for index, info in opponents for battle_index in range(BATTLES_PER_OPPONENT)]
+                replies = await asyncio.gather(*(self._run_task(fields) for _, fields in pairs))
+                outcomes = list(decided)
+                for (info, fields), reply in zip(pairs, replies):
+                    battle = reply["battle"]
+                    outcomes.append((info, battle))
+                    keep_replay(genome, info, fields["battle"], battle)
+                    stats = _stats(reply.get("search_stats"))
+                    if stats is not None and genome.search_stats is not None:
+                        genome.battle_search_stats.append((info["name"], stats))
+                        genome.search_stats.merge(stats)
+                results.update(reduce_battle_outcomes(outcomes))
+        else:
+            reply = await self._run_task({"genome": genome.to_dict(include_results=True)})
+            results = reply["results"]
+            genome.prefiltered_battles = reply.get("prefiltered", 0)
+            genome.battle_replays = reply.get("replays", [])
+            genome.search_stats = _stats(reply.get("search_stats"))
+            genome.battle_search_stats = [(name, _stats(data)) for name, data in reply.get("battle_search_stats", [])]
+        return record_matchup_results(genome, results, self.config_data)
+
+    async def _handle_worker(self, reader, writer):
+        name = "%s:%s" % writer.get_extra_info("peername")[:2]
+        self.writers.add(writer)
+        task = None
+        ready = False
+        try:
+            writer.write(_encode({"type": "config", "fingerprint": self.fingerprint, "config": self.config}))
+            await writer.drain()
+            hello = await asyncio.wait_for(_read_message(reader), self.heartbeat_timeout)
+            if hello.get("fingerprint") != self.fingerprint:
+                print(f"Worker {name} rejected: config fingerprint mismatch.")
+                return
+            print(f"Worker {name} connected.")
+            self.connected += 1
+            ready = True
+
+            while True:
+                task = await self.tasks.get()
+                future = self.futures.get(task["task"])
+                if future is None or future.done():
+                    task = None  # Already answered by another worker
+                    continue
+                if name in self.failed_on.get(task["task"], ()) and self.connected > 1:
+                    # Failed here before: leave it to another worker
+                    self.tasks.put_nowait(task)
+                    task = None
+                    await asyncio.sleep(HEARTBEAT_INTERVAL / 10)
+                    continue
+                writer.write(_encode(task))
+                await writer.drain()
+                while True:
+                    # Any message (heartbeat or result) proves the worker is still alive
+                    message = await asyncio.wait_for(_read_message(reader), self.heartbeat_timeout)
+                    if message["type"] == "heartbeat":
+                        continue
+                    if message.get("task") != task["task"]:
+                        continue
+                    if message["type"] == "result" and not future.done():
+                        future.set_result(message)
+                    elif message["type"] == "error" and not future.done():
+                        failed = self.failed_on.setdefault(task["task"], set())
+                        failed.add(name)
+                        reason = f"Worker {name} failed genome {task['genome']['genome_id']}: {message['reason']}"
+                        if len(failed) < TASK_ATTEMPTS:
+                            print(f"{reason}. Re-dispatching it.")
+                            self.redispatched += 1
+                            self.tasks.put_nowait(task)
+                        else:
+                            future.set_exception(RuntimeError(f"{reason} (failed on {len(failed)} workers)."))
+                    break
+                task = None
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError) as e:
+            print(f"Worker {name} lost ({type(e).__name__}).")
+        except asyncio.CancelledError:
+            pass  # Coordinator shutting down
+        finally:
+            if task is not None and task["task"] in self.futures and not self.futures[task["task"]].done():
+                self.redispatched += 1
+                print(f"Re-dispatching genome {task['genome']['genome_id']}.")
+                self.tasks.put_nowait(task)
+            if ready:
+                self.connected -= 1
+            self.writers.discard(writer)
+            writer.close()
+
+    def shutdown(self):
+        if self.watchdog:
+            self.watchdog.cancel()
+        if self.server:
+            self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        for process in self.local_workers:
+            process.terminate()
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()  # e.g. a hung worker that ignores SIGTERM
+                process.join()
+        if self.redispatched:
+            print(f"{self.redispatched} tasks were re-dispatched after a worker was lost or failed them.")
+
+
+def _send(sock, lock, message: dict):
+    with lock:
+        sock.sendall(_encode(message))
+
+
+def _recv(sock_file) -> dict:
+    header = sock_file.read(_LENGTH.size)
+    if len(header) < _LENGTH.size:
+        return None
+    return json.loads(sock_file.read(_LENGTH.unpack(header)[0]))
+
+
+def _heartbeat(sock, lock, stop, interval):
+    while not stop.wait(interval):
+        try:
+            _send(sock, lock, {"type": "heartbeat"})
+        except OSError:
+            return
+
+
+def run_worker(host: str, port: int, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """Connects to a coordinator and evaluates genomes until the connection closes."""
+    ensure_simulator_started()
+    sock = socket.create_connection((host, port))
+    sock_file = sock.makefile("rb")
+    lock = threading.Lock()
+    config, fingerprint = None, None
+    try:
+        while True:
+            message = _recv(sock_file)
+            if message is None:
+                break
+            if message["type"] == "config":
+                config, fingerprint = message["config"], config_fingerprint(message["config"])
+                _send(sock, lock, {"type": "ready", "fingerprint": fingerprint})
+                continue
+            if message["type"] != "task":
+                continue
+            if message["fingerprint"] != fingerprint:
+                _send(sock, lock, {"type": "error", "task": message["task"], "reason": "config fingerprint mismatch"})
+                continue
+
+            stop = threading.Event()
+            beat = threading.Thread(target=_heartbeat, args=(sock, lock, stop, heartbeat_interval), daemon=True)
+            beat.start()
+            try:
+                genome = PokemonGenome.from_dict(message["genome"], config)
+                if "opponent" in message:
+                    opponent_info = config["GAUNTLET"][message["opponent"]]
+                    battle, stats = play_matchup(genome, opponent_info, config, message["battle"])
+                    reply = {"type": "result", "task": message["task"], "battle": battle,
+                             "search_stats": _stats_data(stats)}
+                else:
+                    results = evaluate_matchups(genome, config)
+                    reply = {"type": "result", "task": message["task"], "results": results,
+                             "prefiltered": genome.prefiltered_battles, "replays": genome.battle_replays,
+                             "search_stats": _stats_data(genome.search_stats),
+                             "battle_search_stats": [(name, _stats_data(stats))
+                                                     for name, stats in genome.battle_search_stats]}
+            except Exception as e:
+                reply = {"type": "error", "task": message["task"], "reason": repr(e)}
+            finally:
+                stop.set()
+                beat.join()
+            _send(sock, lock, reply)
+    except (OSError, ValueError):
+        pass
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project Mewthree evaluation worker.")
+    parser.add_argument("--host", default="127.0.0.1", help="Coordinator address.")
+    parser.add_argument("--port", type=int, default=8765, help="Coordinator port.")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes to run on this host.")
+    args = parser.parse_args()
+    if args.processes > 1:
+        workers = [multiprocessing.Process(target=run_worker, args=(args.host, args.port))
+                   for _ in range(args.processes)]
+        for w in workers: w.start()
+        for w in workers: w.join()
+    else:
+        run_worker(args.host, args.port)
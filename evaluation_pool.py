@@ -0,0 +1,357 @@
+import sys
+import json
+import atexit
+import asyncio
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from pokemon_genome import PokemonGenome
+from population_memory import SharedPopulation
+from search_stats import SearchStats
+from battle_evaluator import (
+    evaluate_fitness, evaluate_genome, keep_replay, matchup_opponents, pending_matchups, prefilter_matchups,
+    play_matchup, play_tournament_game, record_matchup_results, reduce_battle_outcomes, warm_gauntlet_templates,
+    BATTLES_PER_OPPONENT,
+)
+from sim_runtime import (
+    ensure_simulator_started, gil_disabled, simulator_snapshot, use_thread_local_rng, worker_initializer,
+)
+
+# Config (and SharedPopulation, if any) of the run, installed once per worker process by _init_worker
+_worker_config = None
+_worker_population = None
+
+
+def _init_worker(snapshot, config_data, population=None):
+    global _worker_config, _worker_population
+    worker_initializer(snapshot)
+    _worker_config = config_data
+    _worker_population = population
+    warm_gauntlet_templates(config_data)
+
+
+def _started() -> int:
+    return 0  # Submitted once per worker by EvaluationPool.prestart, so every worker is up before the first task
+
+
+def _evaluate_in_worker(genome, config_data: dict) -> tuple:
+    """Runs in a worker process on a pickled copy of the genome; returns what the parent needs back."""
+    evaluate_genome(genome, config_data)
+    return (genome.matchup_results, genome.prefiltered_battles, genome.search_stats,
+            genome.battle_search_stats, genome.battle_replays)
+
+
+def _play_in_worker(genome_data: dict, opponent_index: int, battle_index: int) -> tuple:
+    """One (genome, opponent, battle index) task. Only the genes travel; the gauntlet is already in the worker."""
+    genome = PokemonGenome.from_dict(genome_data, _worker_config)
+    return play_matchup(genome, _worker_config['GAUNTLET'][opponent_index], _worker_config, battle_index)
+
+
+def _play_shared(slot: int, battles: list) -> list:
+    """
+    Plays (opponent index, battle index) battles of the genome in a SharedPopulation
+    slot and writes their results into its results array. Returns only what does
+    not fit there: per battle, its SearchStats and replay (both usually None).
+    """
+    genome = _worker_population.read_genome(slot, _worker_config)
+    extras = []
+    for opponent_index, battle_index in battles:
+        battle, stats = play_matchup(genome, _worker_config['GAUNTLET'][opponent_index], _worker_config, battle_index)
+        _worker_population.write_result(slot, opponent_index, battle_index, battle)
+        extras.append((stats, battle.get("replay")))
+    return extras
+
+
+def _play_game_in_worker(champion1_data: dict, champion2_data: dict, seed: int, record: bool) -> tuple:
+    """One final tournament game between two champions sent as genes."""
+    champion1 = PokemonGenome.from_dict(champion1_data, _worker_config)
+    champion2 = PokemonGenome.from_dict(champion2_data, _worker_config)
+    return play_tournament_game(champion1, champion2, _worker_config, seed, record)
+
+
+def create_process_executor(workers: int, config_data: dict, population=None) -> ProcessPoolExecutor:
+    """A process pool whose workers have the simulator loaded and the run's config (and population block) installed."""
+    if sys.platform.startswith("linux"):
+        # Forked workers inherit the loaded simulator tables for free
+        context, snapshot = multiprocessing.get_context("fork"), None
+    else:
+        context, snapshot = multiprocessing.get_context("spawn"), simulator_snapshot()
+    return ProcessPoolExecutor(
+        max_workers=max(1, workers), mp_context=context,
+        initializer=_init_worker, initargs=(snapshot, config_data, population)
+    )
+
+
+class EvaluationPool:
+    """
+    Evaluates genomes in worker processes, so battles use every core instead of
+    taking turns on the event loop. `evaluate` is awaitable and writes the
+    fitness (and search stats) back onto the caller's genome, exactly like
+    battle_evaluator.evaluate_fitness.
+    With TASK_GRANULARITY = "battle" every battle of a genome is a separate task,
+    so one genome's gauntlet is spread over all workers and a slow genome no
+    longer holds up a single core; "genome" sends each genome as one task.
+    Given the run's PopulationCodec, genomes being evaluated are written into a
+    SharedPopulation block that the workers read by slot and write their battle
+    results back into, so a task is a few integers instead of a pickled genome.
+    """
+    def __init__(self, workers: int, config_data: dict, codec=None):
+        self.workers = max(1, workers)
+        self.config_data = config_data
+        self.granularity = config_data.get('TASK_GRANULARITY', "battle")
+        self.codec = codec
+        # Set on the session pool (see session_pool), which outlives the runs that borrow it
+        self.persistent = False
+        self.population = self._create_population(codec)
+        self.executor = self._create_executor()
+
+    def prestart(self):
+        """Starts every worker now instead of on the first tasks."""
+        wait([self.executor.submit(_started) for _ in range(self.workers)])
+
+    def submit_game(self, champion1, champion2, seed: int, record: bool):
+        """Plays a final tournament game in a worker; returns a future of play_tournament_game's result."""
+        return self.executor.submit(_play_game_in_worker, champion1.to_dict(), champion2.to_dict(), seed, record)
+
+    def _create_population(self, codec):
+        if codec is None:
+            return None
+        capacity = self.config_data.get('POPULATION_SIZE', 0) + self.workers
+        return SharedPopulation(codec, capacity, len(self.config_data['GAUNTLET']), BATTLES_PER_OPPONENT)
+
+    def _create_executor(self):
+        return create_process_executor(self.workers, self.config_data, self.population)
+
+    def _play(self, loop, genome, genome_data: dict, index: int, opponent_info: dict, battle_index: int):
+        return loop.run_in_executor(self.executor, _play_in_worker, genome_data, index, battle_index)
+
+    async def evaluate(self, genome, config_data: dict) -> int:
+        if config_data is not self.config_data:
+            return await self._evaluate_whole(genome, config_data)
+        slot = self.population.acquire(genome) if self.population else None
+        if slot is None and self.granularity != "battle":
+            return await self._evaluate_whole(genome, config_data)
+
+        try:
+            loop = asyncio.get_running_loop()
+            opponents = matchup_opponents(genome, config_data)
+            collect_stats = config_data.get('COLLECT_SEARCH_STATS', False)
+            genome.search_stats = SearchStats() if collect_stats else None
+            genome.battle_search_stats = []
+            genome.battle_replays = []
+            genome.prefiltered_battles = 0
+            if opponents is None:
+                return record_matchup_results(genome, None, config_data)
+
+            results, opponents = pending_matchups(genome, opponents)
+            opponents, decided = prefilter_matchups(genome, opponents, config_data)
+            genome.prefiltered_battles = len(decided)
+            battles = [(index, opponent_info, battle_index) for index, opponent_info in opponents
+                       for battle_index in range(BATTLES_PER_OPPONENT)]
+            if slot is not None:
+                played = await self._play_shared(loop, slot, battles)
+            else:
+                genome_data = genome.to_dict()
+                tasks = [self._play(loop, genome, genome_data, index, opponent_info, battle_index)
+                         for index, opponent_info, battle_index in battles]
+                played = [await task for task in tasks]
+
+            outcomes = list(decided)
+            for (_, opponent_info, battle_index), (battle, stats) in zip(battles, played):
+                outcomes.append((opponent_info, battle))
+                keep_replay(genome, opponent_info, battle_index, battle)
+                if stats is not None:
+                    genome.battle_search_stats.append((opponent_info["name"], stats))
+                    genome.search_stats.merge(stats)
+            results.update(reduce_battle_outcomes(outcomes))
+            return record_matchup_results(genome, results, config_data)
+        finally:
+            if slot is not None:
+                self.population.release(slot)
+
+    async def _play_shared(self, loop, slot: int, battles: list) -> list:
+        """Plays the battles of the genome in a SharedPopulation slot; returns (result, stats) per battle."""
+        pairs = [(index, battle_index) for index, _, battle_index in battles]
+        groups = [[pair] for pair in pairs] if self.granularity == "battle" else [pairs] if pairs else []
+        tasks = [loop.run_in_executor(self.executor, _play_shared, slot, group) for group in groups]
+        extras = []
+        for task in tasks:
+            extras.extend(await task)
+        played = []
+        for (index, battle_index), (stats, replay) in zip(pairs, extras):
+            battle = self.population.read_result(slot, index, battle_index)
+            if replay is not None:
+                battle["replay"] = replay
+            played.append((battle, stats))
+        return played
+
+    async def _evaluate_whole(self, genome, config_data: dict) -> int:
+        loop = asyncio.get_running_loop()
+        results, prefiltered, search_stats, battle_search_stats, replays = await loop.run_in_executor(
+            self.executor, _evaluate_in_worker, genome, config_data
+        )
+        genome.prefiltered_battles = prefiltered
+        genome.search_stats = search_stats
+        genome.battle_search_stats = battle_search_stats
+        genome.battle_replays = replays
+        return record_matchup_results(genome, results, config_data)
+
+    def shutdown(self):
+        """Called by the run that used the pool; a persistent pool stays up for the next one."""
+        if not self.persistent:
+            self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if self.population:
+            self.population.close()
+
+
+class ThreadEvaluationPool(EvaluationPool):
+    """
+    EvaluationPool on MAX_CONCURRENT_EVALUATIONS threads of this process.
+    Genomes, the gauntlet and the simulator tables are shared instead of pickled
+    to (or copied into) worker processes. The search settings travel in each
+    battle's SearchContext and every thread draws from its own simulator RNG,
+    so battles do not interfere. Only faster than processes on a free-threaded
+    interpreter (GIL disabled); with the GIL the threads take turns.
+    """
+    def _create_population(self, codec):
+        return None  # Threads share the genomes themselves
+
+    def _create_executor(self):
+        ensure_simulator_started()
+        use_thread_local_rng()
+        return ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evaluator")
+
+    def prestart(self):
+        pass  # The templates live in this process already
+
+    def submit_game(self, champion1, champion2, seed: int, record: bool):
+        return self.executor.submit(play_tournament_game, champion1, champion2, self.config_data, seed, record)
+
+    def _play(self, loop, genome, genome_data: dict, index: int, opponent_info: dict, battle_index: int):
+        return loop.run_in_executor(self.executor, play_matchup, genome, opponent_info, self.config_data, battle_index)
+
+    async def _evaluate_whole(self, genome, config_data: dict) -> int:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, evaluate_genome, genome, config_data)
+
+
+# The long-lived pool of this process (PERSISTENT_WORKERS) and the settings it was started with
+_session_pool = None
+_session_key = None
+_session_lock = threading.Lock()
+
+
+def _pool_class(config_data: dict):
+    """Threads with EVALUATION_BACKEND "thread" or on a free-threaded interpreter without the GIL, else processes."""
+    if config_data.get('EVALUATION_BACKEND', "async") == "thread" or gil_disabled():
+        return ThreadEvaluationPool
+    return EvaluationPool
+
+
+def _config_key(config_data: dict) -> str:
+    canonical = json.dumps(config_data, sort_keys=True, separators=(",", ":"), default=repr)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def _codec_key(codec) -> tuple:
+    return (codec.name, codec.is_custom, tuple(sorted(codec.move_ids.items())),
+            tuple(codec.types), tuple(codec.natures), tuple(codec.abilities))
+
+
+def session_pool(config_data: dict, codec=None) -> EvaluationPool:
+    """
+    The worker pool shared by every run of this process with these settings.
+    Its workers are started once and keep the simulator tables and the built
+    gauntlet and genome templates between generations, runs and the final
+    tournament. Settings that differ (or a codec the pool lacks) replace it
+    with a new one. The last pool is closed when the process exits.
+    """
+    global _session_pool, _session_key
+    pool_class = _pool_class(config_data)
+    key = (pool_class, _config_key(config_data))
+    with _session_lock:
+        pool = _session_pool
+        if pool is not None and _session_key == key \
+                and (codec is None or (pool.codec is not None and _codec_key(pool.codec) == _codec_key(codec))):
+            # Equal settings: let evaluate() treat the caller's dict as the one the workers have
+            pool.config_data = config_data
+            return pool
+        if pool is not None:
+            pool.close()
+        else:
+            atexit.register(close_session_pool)
+        pool = pool_class(config_data['MAX_CONCURRENT_EVALUATIONS'], config_data, codec)
+        pool.persistent = True
+        pool.prestart()
+        _session_pool, _session_key = pool, key
+        return pool
+
+
+def running_session_pool(config_data: dict):
+    """The session pool if one is already running with these settings, else None (never starts one)."""
+    with _session_lock:
+        if _session_pool is not None and _session_key == (_pool_class(config_data), _config_key(config_data)):
+            _session_pool.config_data = config_data
+            return _session_pool
+    return None
+
+
+def game_pool(config_data: dict) -> EvaluationPool:
+    """
+    Workers for final tournament games, whatever the EVALUATION_BACKEND: the session
+    pool if one is running with these settings, else a new pool of
+    MAX_CONCURRENT_EVALUATIONS workers (not persistent, so shutdown() closes it).
+    Never starts a session pool.
+    """
+    pool = running_session_pool(config_data)
+    if pool is None:
+        pool = _pool_class(config_data)(config_data['MAX_CONCURRENT_EVALUATIONS'], config_data)
+    return pool
+
+
+def close_session_pool():
+    global _session_pool, _session_key
+    with _session_lock:
+        if _session_pool is not None:
+            _session_pool.close()
+        _session_pool = _session_key = None
+
+
+def create_evaluator(config_data: dict, codec=None):
+    """
+    Returns (evaluate, pool) for the configured EVALUATION_BACKEND.
+    `evaluate(genome)` is a coroutine; `pool` is None for the in-process backend
+    and must be shut down by the caller otherwise (process/thread pool or distributed coordinator).
+    "process" becomes "thread" on a free-threaded interpreter with the GIL disabled.
+    `codec` (the run's PopulationCodec) lets the process pool send genomes through shared memory.
+    With PERSISTENT_WORKERS the process/thread pool is the session_pool, which shutdown() leaves running.
+    """
+    backend = config_data.get('EVALUATION_BACKEND', "async")
+    if backend == "process" and gil_disabled():
+        print("Free-threaded interpreter without the GIL: evaluating in threads instead of processes.")
+        backend = "thread"
+    if backend in ("process", "thread"):
+        if config_data.get('PERSISTENT_WORKERS', True):
+            pool = session_pool(config_data, codec)
+        else:
+            pool = _pool_class(config_data)(config_data['MAX_CONCURRENT_EVALUATIONS'], config_data, codec)
+
+        async def evaluate(genome):
+            return await pool.evaluate(genome, config_data)
+        return evaluate, pool
+
+    if backend == "distributed":
+        from distributed_eval import Coordinator
+        coordinator = Coordinator(config_data)
+        return coordinator.evaluate, coordinator
+
+    if backend != "async":
+        print(f"Unknown EVALUATION_BACKEND '{backend}', evaluating in-process.")
+
+    async def evaluate(genome):
+        return await evaluate_fitness(genome, config_data)
+    return evaluate, None
@@ -1,9 +1,18 @@
+import os
 import random
 import asyncio
 import copy
 import math
 from pokemon_genome import PokemonGenome
-from battle_evaluator import evaluate_fitness
+from evaluation_pool import create_evaluator
+from population_memory import PopulationCodec
+from search_stats import SearchStats
+from profiling import build_hooks, phase
+from sim_runtime import ensure_simulator_started
+from genome_validation import GenomeWhitelist, validate_population
+from surrogate import SurrogateModel
+from battle_evaluator import BATTLES_PER_OPPONENT
+from battle_replay import write_replays
 
 # Species class to manage genomes of the same species
 class Species:
@@ -17,6 +26,9 @@ class Species:
         
     def add_genome(self, genome: PokemonGenome):
         self.genomes.append(genome)
+
+    def remove_genome(self, genome: PokemonGenome):
+        self.genomes.remove(genome)
         
     def get_best_genome(self) -> PokemonGenome:
         return max(self.genomes, key=lambda g: g.fitness)
@@ -46,29 +58,77 @@ class Species:
         survivors_count = max(1, math.ceil(len(self.genomes) * survival_threshold))
         self.genomes = self.genomes[:survivors_count]
         
-    def select_parent(self) -> PokemonGenome:
-        """Tournament selection: randomly pick k genomes and return the best among them."""
+    def select_parent(self, survival_threshold=1.0) -> PokemonGenome:
+        """Tournament selection: randomly pick k genomes and return the best among them.
+        With survival_threshold < 1, only that top portion of the species can be picked
+        (the steady-state mode selects this way instead of culling)."""
         if not self.genomes: return None
-        k = min(3, len(self.genomes))
-        tournament_entrants = random.sample(self.genomes, k)
+        candidates = self.genomes
+        if survival_threshold < 1.0:
+            candidates = sorted(candidates, key=lambda g: g.shared_fitness, reverse=True)
+            candidates = candidates[:max(1, math.ceil(len(candidates) * survival_threshold))]
+        k = min(3, len(candidates))
+        tournament_entrants = random.sample(candidates, k)
         return max(tournament_entrants, key=lambda g: g.shared_fitness)
 
 
 # Main Evolutionary Algorithm class
 class EvolutionaryAlgorithm:
-    def __init__(self, base_pokemon_data, config_data: dict):
+    def __init__(self, base_pokemon_data, config_data: dict, hooks=None):
         self.base_pokemon_data = base_pokemon_data
         # mode is removed; we always use advanced
         self.config_data = config_data
-        self.population = [PokemonGenome(self.base_pokemon_data, self.config_data) for _ in range(self.config_data['POPULATION_SIZE'])]
+        # Simulator-valid moves/types/natures/abilities, resolved once for the whole run
+        self.whitelist = GenomeWhitelist(self.base_pokemon_data, self.config_data)
+        self.population = [PokemonGenome(self.base_pokemon_data, self.config_data, whitelist=self.whitelist) for _ in range(self.config_data['POPULATION_SIZE'])]
         self.species = []
         self.best_genome_so_far = None
         self.generation = 0
         self.history = []
+        # Genomes received from other populations (island model), waiting to be evaluated here
+        self.immigrants = []
+        # Optional fitness predictor that pre-screens offspring before real evaluation
+        self.surrogate = SurrogateModel(self.whitelist, self.config_data) if self.config_data.get('SURROGATE_SCREENING') else None
+        # Observers of the run (see profiling.EvolutionHooks); built-in ones come from the config
+        self.hooks = build_hooks(self.config_data) + list(hooks or [])
 
     async def run(self, progress_callback=None):
         print(f"--- Starting Evolution for {self.base_pokemon_data['name'].capitalize()} ---")
+        # Load the simulator data once for the whole run (workers forked later inherit it)
+        ensure_simulator_started()
+        print(self.whitelist.summary())
+        if self.whitelist.species_error:
+            print(f"WARNING: no genome can be built: {self.whitelist.species_error}.")
+
+        evaluate, pool = create_evaluator(self.config_data, PopulationCodec(self.whitelist, self.base_pokemon_data))
+        try:
+            if self.config_data.get('EVOLUTION_MODE', "generational") == "steady_state":
+                await self._run_steady_state(evaluate, progress_callback)
+            else:
+                await self._run_generational(evaluate, progress_callback)
+        finally:
+            if pool:
+                pool.shutdown()
+            # Also when the run fails, so profilers stop and write what they have
+            for hook in self.hooks:
+                hook.on_run_end()
+
+        print("\n--- Evolution Finished ---")
+        champions = []
+        for s in self.species:
+            if s.genomes:
+                champions.append(s.get_best_genome())
+                
+        if not champions and self.best_genome_so_far:
+            print(f"No surviving species. Returning the best genome found during the run (ID {self.best_genome_so_far.genome_id}).")
+            champions = [self.best_genome_so_far]
+        
+        print(f"Found {len(champions)} champions for the final tournament.")
         
+        return champions, self.history
+
+    async def _run_generational(self, evaluate, progress_callback=None):
+        """Classic generational loop: evaluate everyone, then speciate, share fitness and reproduce."""
         semaphore = asyncio.Semaphore(self.config_data['MAX_CONCURRENT_EVALUATIONS'])
         generations = self.config_data['GENERATIONS']
         population_size = self.config_data['POPULATION_SIZE']
@@ -77,8 +137,7 @@ class EvolutionaryAlgorithm:
 
         async def limited_evaluator(genome):
             async with semaphore:
-                # Removed mode argument
-                await evaluate_fitness(genome, self.config_data)
+                await evaluate(genome)
 
         # Main evolutionary loop
         for gen in range(generations):
@@ -96,117 +155,368 @@ class EvolutionaryAlgorithm:
                 nonlocal completed_evals
                 await limited_evaluator(genome)
                 completed_evals += 1
+                for hook in self.hooks:
+                    hook.on_genome_evaluated(genome, self.generation)
                 if progress_callback:
                     progress_callback(completed_evals, total_evals)
 
+            for hook in self.hooks:
+                hook.on_generation_start(self.generation)
+
+            # 0. Validate the whole population before spending CPU on battles
+            with phase(self.hooks, "validation", self.generation):
+                invalid = validate_population(self.population, self.whitelist)
+                invalid_ids = {genome.genome_id for genome, _ in invalid}
+                for genome, reason in invalid:
+                    genome.fitness = 0
+                    genome.search_stats = None
+                    if not self.whitelist.species_error:
+                        print(f"Invalid genome {genome.genome_id}, skipping. Error: {reason}")
+                completed_evals = len(invalid)
+
             # 1. Evaluate fitness
             print(f"Evaluating population fitness ({self.config_data['MAX_CONCURRENT_EVALUATIONS']} at a time)...")
-            tasks = [tracked_evaluator(genome) for genome in self.population]
-            await asyncio.gather(*tasks)
+            with phase(self.hooks, "evaluation", self.generation):
+                tasks = [tracked_evaluator(genome) for genome in self.population if genome.genome_id not in invalid_ids]
+                await asyncio.gather(*tasks)
+
+            generation_search_stats = None
+            if self.config_data.get('COLLECT_SEARCH_STATS', False):
+                generation_search_stats = SearchStats()
+                for genome in self.population:
+                    generation_search_stats.merge(genome.search_stats)
+                print(f"Search stats: {generation_search_stats.summary()}")
+
+            skipped_battles = self._prefilter_summary(self.population)
+            self._write_replays(self.population)
+
+            surrogate_report = None
+            if self.surrogate:
+                with phase(self.hooks, "surrogate", self.generation):
+                    surrogate_report = self._update_surrogate(self.population)
             
             # 2. Speciate
-            self._speciate_population()
+            with phase(self.hooks, "speciation", self.generation):
+                self._speciate_population()
             
             # 3. Calculate shared fitness and check for stagnation
-            total_avg_shared_fitness = 0
-            surviving_species = []
-            for s in self.species:
-                if not s.genomes: continue
-                s.calculate_shared_fitness()
-                s.update_stagnation()
-                if s.generations_stagnant > stagnation_limit and len(self.species) > 1:
-                    print(f"Species {s.representative.genome_id} is stagnant. Removing.")
-                    continue
-                surviving_species.append(s)
-                total_avg_shared_fitness += sum(g.shared_fitness for g in s.genomes) / len(s.genomes)
-            self.species = surviving_species
+            with phase(self.hooks, "fitness_sharing", self.generation):
+                total_avg_shared_fitness = 0
+                surviving_species = []
+                for s in self.species:
+                    if not s.genomes: continue
+                    s.calculate_shared_fitness()
+                    s.update_stagnation()
+                    if s.generations_stagnant > stagnation_limit and len(self.species) > 1:
+                        print(f"Species {s.representative.genome_id} is stagnant. Removing.")
+                        continue
+                    surviving_species.append(s)
+                    total_avg_shared_fitness += sum(g.shared_fitness for g in s.genomes) / len(s.genomes)
+                self.species = surviving_species
             if not self.species:
                 print("All species died! Ending evolution.")
-                break
+                return
             
             # 4. Calculate offspring
-            total_offspring = 0
-            for s in self.species:
-                if total_avg_shared_fitness > 0:
-                    species_avg_shared_fitness = sum(g.shared_fitness for g in s.genomes) / len(s.genomes)
-                    share = species_avg_shared_fitness / total_avg_shared_fitness
-                    s.offspring_to_spawn = math.floor(share * population_size)
-                else:
-                    s.offspring_to_spawn = population_size // len(self.species)
-                total_offspring += s.offspring_to_spawn
-            remainder = population_size - total_offspring
-            for i in range(remainder):
-                self.species[i % len(self.species)].offspring_to_spawn += 1
+            with phase(self.hooks, "offspring_allocation", self.generation):
+                total_offspring = 0
+                for s in self.species:
+                    if total_avg_shared_fitness > 0:
+                        species_avg_shared_fitness = sum(g.shared_fitness for g in s.genomes) / len(s.genomes)
+                        share = species_avg_shared_fitness / total_avg_shared_fitness
+                        s.offspring_to_spawn = math.floor(share * population_size)
+                    else:
+                        s.offspring_to_spawn = population_size // len(self.species)
+                    total_offspring += s.offspring_to_spawn
+                remainder = population_size - total_offspring
+                for i in range(remainder):
+                    self.species[i % len(self.species)].offspring_to_spawn += 1
 
             # 5. Cull and Reproduce
             next_generation = []
-            current_best_genome = max(self.population, key=lambda g: g.fitness)
-            if not self.best_genome_so_far or current_best_genome.fitness > self.best_genome_so_far.fitness:
+            with phase(self.hooks, "bookkeeping", self.generation):
+                record = self._record_generation(generation_search_stats, surrogate_report, skipped_battles)
+            
+            with phase(self.hooks, "reproduction", self.generation):
+                for s in self.species:
+                    s.cull(survival_threshold)
+                    if s.offspring_to_spawn > 0 and s.genomes:
+                        with phase(self.hooks, "deepcopy", self.generation):
+                            next_generation.append(self._carry_over(copy.deepcopy(s.get_best_genome())))
+                    next_generation.extend(self._breed_offspring(s, s.offspring_to_spawn - 1))
+
+            self.population = next_generation
+
+            for hook in self.hooks:
+                hook.on_generation_end(self.generation, record)
+
+    async def _run_steady_state(self, evaluate, progress_callback=None):
+        """
+        Steady-state (rtNEAT-style) loop. Up to MAX_CONCURRENT_EVALUATIONS genomes
+        are always in flight; as soon as one finishes it joins its species, the
+        genome with the lowest shared fitness is retired once the population is
+        full, and a new offspring is sent out in its place, so no worker waits for
+        the slowest battle of a generation. Every POPULATION_SIZE completed
+        evaluations count as one generation for logging, history and stagnation,
+        which keeps the evaluation budget equal to the generational mode.
+        """
+        workers = self.config_data['MAX_CONCURRENT_EVALUATIONS']
+        population_size = self.config_data['POPULATION_SIZE']
+        generations = self.config_data['GENERATIONS']
+        budget = generations * population_size
+        collect_stats = self.config_data.get('COLLECT_SEARCH_STATS', False)
+        loop = asyncio.get_running_loop()
+
+        unevaluated = list(self.population)  # The initial population is sent out first
+        self.population = []
+        self.species = []
+        in_flight = {}  # future -> genome
+        submitted = 0
+        evaluated = 0
+        generation_search_stats = None
+        generation_genomes = []  # Evaluated during the current generation
+
+        def start_generation(gen):
+            nonlocal generation_search_stats, generation_genomes
+            self.generation = gen
+            generation_genomes = []
+            print(f"\n--- Generation {self.generation}/{generations} (steady-state, {workers} in flight) ---")
+            generation_search_stats = SearchStats() if collect_stats else None
+            for hook in self.hooks:
+                hook.on_generation_start(self.generation)
+            if progress_callback:
+                progress_callback(0, population_size)
+
+        start_generation(1)
+        while True:
+            # Keep every worker busy; new offspring need at least one evaluated species to breed from
+            with phase(self.hooks, "reproduction", self.generation):
+                while len(in_flight) < workers and submitted < budget and (unevaluated or self.species):
+                    if unevaluated:
+                        genome = unevaluated.pop(0)
+                    elif self.immigrants:
+                        genome = self.immigrants.pop(0)
+                    else:
+                        genome = self._spawn_offspring()
+                    submitted += 1
+                    reason = self.whitelist.check(genome)
+                    if reason:
+                        if not self.whitelist.species_error:
+                            print(f"Invalid genome {genome.genome_id}, skipping. Error: {reason}")
+                        genome.fitness = 0
+                        genome.search_stats = None
+                        future = loop.create_future()
+                        future.set_result(0)
+                    else:
+                        future = asyncio.ensure_future(evaluate(genome))
+                    in_flight[future] = genome
+            if not in_flight:
+                break
+
+            with phase(self.hooks, "evaluation", self.generation):
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+
+            for future in done:
+                genome = in_flight.pop(future)
+                future.result()
+                evaluated += 1
+                for hook in self.hooks:
+                    hook.on_genome_evaluated(genome, self.generation)
+                if generation_search_stats is not None:
+                    generation_search_stats.merge(genome.search_stats)
+                generation_genomes.append(genome)
+
+                with phase(self.hooks, "speciation", self.generation):
+                    species = self._add_to_species(genome)
+                    self.population.append(genome)
+                with phase(self.hooks, "fitness_sharing", self.generation):
+                    species.calculate_shared_fitness()
+                    if len(self.population) > population_size:
+                        self._retire_worst_genome()
+
+                if progress_callback:
+                    progress_callback(evaluated - (self.generation - 1) * population_size, population_size)
+
+                if evaluated % population_size == 0:
+                    self._end_steady_state_generation(generation_search_stats, generation_genomes)
+                    if evaluated < budget:
+                        start_generation(self.generation + 1)
+
+    def _end_steady_state_generation(self, generation_search_stats, evaluated_genomes):
+        """Generation boundary of the steady-state mode: stagnation check, surrogate refit, logging and hooks."""
+        if generation_search_stats is not None:
+            print(f"Search stats: {generation_search_stats.summary()}")
+        skipped_battles = self._prefilter_summary(evaluated_genomes)
+        self._write_replays(evaluated_genomes)
+        surrogate_report = None
+        if self.surrogate:
+            with phase(self.hooks, "surrogate", self.generation):
+                surrogate_report = self._update_surrogate(evaluated_genomes)
+        with phase(self.hooks, "fitness_sharing", self.generation):
+            for s in list(self.species):
+                s.update_stagnation()
+                if s.generations_stagnant > self.config_data['STAGNATION_LIMIT'] and len(self.species) > 1:
+                    print(f"Species {s.representative.genome_id} is stagnant. Removing.")
+                    self.species.remove(s)
+                    for genome in s.genomes:
+                        self.population.remove(genome)
+        with phase(self.hooks, "bookkeeping", self.generation):
+            record = self._record_generation(generation_search_stats, surrogate_report, skipped_battles)
+        for hook in self.hooks:
+            hook.on_generation_end(self.generation, record)
+
+    def _prefilter_summary(self, evaluated_genomes: list):
+        """Prints how many battles MATCHUP_PREFILTER decided without simulating; returns that count (None when off)."""
+        if not self.config_data.get('MATCHUP_PREFILTER', False):
+            return None
+        skipped = sum(g.prefiltered_battles for g in evaluated_genomes)
+        total = sum(len(g.matchup_wins) * BATTLES_PER_OPPONENT for g in evaluated_genomes if g.matchup_wins)
+        print(f"Pre-filter: skipped {skipped}/{total} battles")
+        return skipped
+
+    def _write_replays(self, evaluated_genomes: list):
+        """Appends the generation's recorded battles to BATTLE_REPLAY_DIR/gen_XXX.bin (see battle_replay)."""
+        replay_dir = self.config_data.get('BATTLE_REPLAY_DIR')
+        if not replay_dir:
+            return
+        path = os.path.join(replay_dir, f"gen_{self.generation:03d}.bin")
+        battles = write_replays(path, evaluated_genomes)
+        print(f"Recorded {battles} battles to {path}")
+
+    def _record_generation(self, generation_search_stats, surrogate_report=None, skipped_battles=None) -> dict:
+        """Tracks the best genome so far, prints the generation summary and appends it to the history."""
+        current_best_genome = max(self.population, key=lambda g: g.fitness)
+        if not self.best_genome_so_far or current_best_genome.fitness > self.best_genome_so_far.fitness:
+            with phase(self.hooks, "deepcopy", self.generation):
                 self.best_genome_so_far = copy.deepcopy(current_best_genome)
 
-            avg_fitness = 0.0
-            if self.population:
-                avg_fitness = sum(g.fitness for g in self.population) / len(self.population)
+        avg_fitness = 0.0
+        if self.population:
+            avg_fitness = sum(g.fitness for g in self.population) / len(self.population)
 
-            # --- Log stats for this generation ---
-            print(f"Best fitness in gen: {current_best_genome.fitness:.2f}")
-            print(f"Avg fitness in gen:  {avg_fitness:.2f}")
-            print(f"Active Species:      {len(self.species)}")
-            print(f"Best genome so far (Fitness: {self.best_genome_so_far.fitness:.2f}):\n{self.best_genome_so_far}")
-            
-            # --- Record stats for history plot ---
-            if self.population:
-                self.history.append({
-                    'gen': self.generation,
-                    'best_fitness': current_best_genome.fitness,
-                    'avg_fitness': avg_fitness,
-                    'num_species': len(self.species)
-                })
-            
-            for s in self.species:
-                s.cull(survival_threshold)
-                if s.offspring_to_spawn > 0 and s.genomes:
-                    next_generation.append(copy.deepcopy(s.get_best_genome()))
-                for _ in range(s.offspring_to_spawn - 1):
-                    p1 = s.select_parent()
-                    p2 = s.select_parent()
-                    if not p1 or not p2: continue
-                    child = self._crossover(p1, p2)
-                    if random.random() < self.config_data['MUTATION_RATE']:
-                        child.mutate()
-                    next_generation.append(child)
+        # --- Log stats for this generation ---
+        print(f"Best fitness in gen: {current_best_genome.fitness:.2f}")
+        print(f"Avg fitness in gen:  {avg_fitness:.2f}")
+        print(f"Active Species:      {len(self.species)}")
+        print(f"Best genome so far (Fitness: {self.best_genome_so_far.fitness:.2f}):\n{self.best_genome_so_far}")
 
-            self.population = next_generation
+        # --- Record stats for history plot ---
+        record = {
+            'gen': self.generation,
+            'best_fitness': current_best_genome.fitness,
+            'avg_fitness': avg_fitness,
+            'num_species': len(self.species),
+            'search_stats': generation_search_stats.as_dict() if generation_search_stats else None,
+            'surrogate': surrogate_report,
+            'skipped_battles': skipped_battles
+        }
+        if self.population:
+            self.history.append(record)
+        return record
 
-        print("\n--- Evolution Finished ---")
-        champions = []
-        for s in self.species:
-            if s.genomes:
-                champions.append(s.get_best_genome())
-                
-        if not champions and self.best_genome_so_far:
-            print(f"No surviving species. Returning the best genome found during the run (ID {self.best_genome_so_far.genome_id}).")
-            champions = [self.best_genome_so_far]
-        
-        print(f"Found {len(champions)} champions for the final tournament.")
-        
-        return champions, self.history
+    def emigrants(self, count: int) -> list:
+        """The `count` fittest evaluated genomes, for sending to another population."""
+        evaluated = [g for s in self.species for g in s.genomes]
+        return sorted(evaluated, key=lambda g: g.fitness, reverse=True)[:count]
+
+    def receive_migrants(self, migrants: list):
+        """
+        Adds genomes evolved in another population. They are evaluated here:
+        the generational mode swaps them in for the weakest members of the next
+        generation, the steady-state mode sends them out before new offspring.
+        """
+        for genome in migrants:
+            genome.whitelist = self.whitelist
+            genome.config_data = self.config_data
+            self._carry_over(genome)
+        if self.config_data.get('EVOLUTION_MODE', "generational") == "steady_state":
+            self.immigrants.extend(migrants)
+            return
+        # Fresh offspring still carry fitness 0, so this replaces children before elites
+        weakest = sorted(range(len(self.population)), key=lambda i: self.population[i].fitness)
+        for i, genome in zip(weakest, migrants):
+            self.population[i] = genome
 
+    def _carry_over(self, genome: PokemonGenome) -> PokemonGenome:
+        """
+        Prepares an elite or migrant for another evaluation: with REEVALUATE_ELITES it
+        battles the whole gauntlet again, otherwise only opponents it has no results against.
+        """
+        if self.config_data.get('REEVALUATE_ELITES', True):
+            genome.clear_results()
+        return genome
+
+    def _spawn_offspring(self) -> PokemonGenome:
+        """Steady-state reproduction: picks a species in proportion to its average shared fitness and breeds one child."""
+        weights = [sum(g.shared_fitness for g in s.genomes) / len(s.genomes) for s in self.species]
+        if sum(weights) > 0:
+            species = random.choices(self.species, weights)[0]
+        else:
+            species = random.choice(self.species)
+        return self._breed_offspring(species, 1, self.config_data['SURVIVAL_THRESHOLD'])[0]
+
+    def _breed_offspring(self, species: Species, count: int, survival_threshold=1.0) -> list:
+        """
+        Breeds `count` children (crossover, then mutation) from the species. With the
+        surrogate enabled and trained, more candidates are bred and only the ones with
+        the best predicted fitness are kept for real evaluation.
+        """
+        if count <= 0:
+            return []
+        n_candidates = self.surrogate.candidates_for(count) if self.surrogate else count
+        children = []
+        for _ in range(n_candidates):
+            p1 = species.select_parent(survival_threshold)
+            p2 = species.select_parent(survival_threshold)
+            if not p1 or not p2: continue
+            child = self._crossover(p1, p2)
+            if random.random() < self.config_data['MUTATION_RATE']:
+                child.mutate()
+            children.append(child)
+        if self.surrogate:
+            children = self.surrogate.screen(children, count)
+        return children
+
+    def _update_surrogate(self, evaluated_genomes: list) -> dict:
+        """Scores the last predictions against real results, then retrains on them."""
+        report = self.surrogate.report(evaluated_genomes)
+        self.surrogate.observe(evaluated_genomes)
+        self.surrogate.fit()
+        report['samples'] = len(self.surrogate.samples_x)
+        report['active'] = self.surrogate.ready
+        print(SurrogateModel.summary(report))
+        return report
+
+    def _retire_worst_genome(self):
+        """Removes the genome with the lowest shared fitness, and its species if that empties it."""
+        worst_species, worst = None, None
+        for s in self.species:
+            for genome in s.genomes:
+                if worst is None or genome.shared_fitness < worst.shared_fitness:
+                    worst_species, worst = s, genome
+        worst_species.remove_genome(worst)
+        self.population.remove(worst)
+        if worst_species.genomes:
+            worst_species.calculate_shared_fitness()
+        else:
+            self.species.remove(worst_species)
 
     def _speciate_population(self):
         for s in self.species:
             s.genomes = [] 
         for genome in self.population:
-            found_species = False
-            for s in self.species:
-                dist = self._get_compatibility_distance(genome, s.representative)
-                if dist < self.config_data['COMPATIBILITY_THRESHOLD']:
-                    s.add_genome(genome)
-                    found_species = True
-                    break
-            if not found_species:
-                new_species = Species(genome)
-                self.species.append(new_species)
+            self._add_to_species(genome)
+
+    def _add_to_species(self, genome: PokemonGenome) -> Species:
+        """Adds the genome to the first compatible species, or founds a new one."""
+        for s in self.species:
+            dist = self._get_compatibility_distance(genome, s.representative)
+            if dist < self.config_data['COMPATIBILITY_THRESHOLD']:
+                s.add_genome(genome)
+                return s
+        new_species = Species(genome)
+        self.species.append(new_species)
+        return new_species
                 
     def _find_species_id(self, genome: PokemonGenome):
         for s in self.species:
@@ -249,7 +559,7 @@ class EvolutionaryAlgorithm:
         return distance
 
     def _crossover(self, p1: PokemonGenome, p2: PokemonGenome):
-        child = PokemonGenome(self.base_pokemon_data, self.config_data, random_init=False)
+        child = PokemonGenome(self.base_pokemon_data, self.config_data, random_init=False, whitelist=self.whitelist)
         child.nature = random.choice([p1.nature, p2.nature])
         combined_moves = list(set(p1.moves + p2.moves))
         if len(combined_moves) < 4:
@@ -299,7 +609,7 @@ class EvolutionaryAlgorithm:
             else:
                 child.types = combined_types
                 while len(child.types) < num_types:
-                    new_type = random.choice([t for t in self.config_data['POKEMON_TYPES'] if t not in child.types])
+                    new_type = random.choice([t for t in child._type_pool() if t not in child.types])
                     child.types.append(new_type)
             child.types.sort()
         else:
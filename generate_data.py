@@ -1,5 +1,15 @@
-import requests
+import os
 import json
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from pokemon_db import build_database_file, source_digest
 
 # --- Configuration ---
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2/"
@@ -7,6 +17,12 @@ POKEAPI_BASE_URL = "https://pokeapi.co/api/v2/"
 # Set limit to 493 (Gen 1-4)
 POKEMON_LIMIT = 493
 
+# Raw API responses are stored here, so reruns only download what is missing.
+CACHE_DIR = ".pokeapi_cache"
+
+# Concurrent requests (and pooled keep-alive connections) to PokéAPI.
+MAX_WORKERS = 16
+
 # A prioritized list of version groups for Gen 4.
 # We prioritize the most "complete" versions of that generation.
 FALLBACK_VERSION_GROUPS = [
@@ -19,83 +35,156 @@ FALLBACK_VERSION_GROUPS = [
 ]
 
 
-def generate_pokemon_data():
+class PokeApiSource:
+    """
+    Fetches PokéAPI JSON through an on-disk cache.
+    Responses are stored as `<cache_dir>/<api path>.json` (e.g. `pokemon/25.json`),
+    so a cache directory can also be used as an offline stand-in for the API
+    with `offline=True`, in which case nothing is requested over the network.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, offline=False, max_workers=MAX_WORKERS):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.session = None if offline else self._make_session(max_workers)
+        self.hits = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _make_session(max_workers):
+        # One keep-alive connection per worker, with backoff on throttling and server errors
+        retry = Retry(
+            total=5, backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",)
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def cache_path(self, url: str) -> str:
+        parsed = urlparse(url)
+        path = parsed.path.split("/api/v2/", 1)[-1].strip("/")
+        if parsed.query:
+            path += "_" + parsed.query.replace("&", "_").replace("=", "-")
+        return os.path.join(self.cache_dir, *path.split("/")) + ".json"
+
+    def get_json(self, url: str) -> dict:
+        path = self.cache_path(url)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            with self._lock:
+                self.hits += 1
+            return data
+        if self.offline:
+            raise FileNotFoundError(f"{path} is not in the local source directory")
+
+        response = self.session.get(url, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+
+        # Write to a temporary file first so an interrupted run never leaves a truncated entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.downloads += 1
+        return data
+
+
+def _parse_pokemon(data: dict) -> tuple:
+    """Turns a raw /pokemon/<id> response into a POKEMON_DATABASE entry and the version group used."""
+    # --- Stat and Type extraction ---
+    stats = {stat['stat']['name']: stat['base_stat'] for stat in data['stats']}
+    formatted_stats = {
+        "hp": stats.get("hp", 0), "atk": stats.get("attack", 0),
+        "def": stats.get("defense", 0), "spa": stats.get("special-attack", 0),
+        "spd": stats.get("special-defense", 0), "spe": stats.get("speed", 0),
+    }
+    types = [t['type']['name'] for t in data['types']]
+
+    # --- Ability Logic ---
+    # Save the raw, lowercase, hyphenated ability name.
+    # This is the format poke-battle-sim requires (e.g., "sand-veil").
+    ability = next((a['ability']['name'] for a in data['abilities'] if not a['is_hidden']), "unknown")
+
+    # --- Learnset Logic with Fallback ---
+    learnset = set()
+    found_generation = None
+
+    for version_group in FALLBACK_VERSION_GROUPS:
+        temp_learnset = set()
+        for move_data in data['moves']:
+            for version_details in move_data['version_group_details']:
+                if version_details['version_group']['name'] == version_group:
+                    # Add the correctly formatted, hyphenated move name
+                    temp_learnset.add(move_data['move']['name'])
+                    break # Go to the next move
+
+        # If we found moves in this generation, we are done
+        if temp_learnset:
+            learnset = temp_learnset
+            found_generation = version_group
+            break # Exit the fallback loop
+
+    entry = {
+        "base_stats": formatted_stats,
+        "types": types,
+        "ability": ability,
+        "learnset": sorted(list(learnset))
+    }
+    return entry, found_generation
+
+
+def generate_pokemon_data(limit=POKEMON_LIMIT, cache_dir=CACHE_DIR, source_dir=None,
+                          max_workers=MAX_WORKERS, file_path="pokemon_data.py"):
     """
     Fetches data from PokéAPI for all Gen 1-4 Pokémon (up to 493)
     and saves it into a Python file.
+    Requests run concurrently and are cached on disk, so an interrupted run
+    resumes where it stopped. With `source_dir`, a directory of cached JSON
+    is used instead of the network.
     """
     print("--- Starting Pokémon Data Generation (Gen 1-4) ---")
-    pokemon_database = {}
+    source = PokeApiSource(source_dir or cache_dir, offline=source_dir is not None, max_workers=max_workers)
 
-    response = requests.get(f"{POKEAPI_BASE_URL}pokemon?limit={POKEMON_LIMIT}")
-    if response.status_code != 200:
-        print("Failed to fetch Pokémon list.")
+    try:
+        pokemon_list = source.get_json(f"{POKEAPI_BASE_URL}pokemon?limit={limit}")['results']
+    except Exception as e:
+        print(f"Failed to fetch Pokémon list: {e}")
         return
 
-    pokemon_list = response.json()['results']
+    def fetch(p):
+        data = source.get_json(p['url'])
+        return _parse_pokemon(data)
 
-    for i, p in enumerate(pokemon_list):
-        pokemon_name = p['name']
-        print(f"Fetching data for ({i+1}/{POKEMON_LIMIT}): {pokemon_name.capitalize()}...")
-
-        try:
-            detail_response = requests.get(p['url'])
-            if detail_response.status_code != 200:
-                print(f"  -> Failed to fetch details for {pokemon_name}. Skipping.")
+    pokemon_database = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch, p) for p in pokemon_list]
+        # Collect in list order so the output file is stable regardless of completion order
+        for i, (p, future) in enumerate(zip(pokemon_list, futures)):
+            pokemon_name = p['name']
+            try:
+                entry, found_generation = future.result()
+            except Exception as e:
+                print(f"  -> An error occurred while processing {pokemon_name}: {e}")
                 continue
-            
-            data = detail_response.json()
-
-            # --- Stat and Type extraction ---
-            stats = {stat['stat']['name']: stat['base_stat'] for stat in data['stats']}
-            formatted_stats = {
-                "hp": stats.get("hp", 0), "atk": stats.get("attack", 0),
-                "def": stats.get("defense", 0), "spa": stats.get("special-attack", 0),
-                "spd": stats.get("special-defense", 0), "spe": stats.get("speed", 0),
-            }
-            types = [t['type']['name'] for t in data['types']]
-            
-            # --- Ability Logic ---
-            # Save the raw, lowercase, hyphenated ability name.
-            # This is the format poke-battle-sim requires (e.g., "sand-veil").
-            ability = next((a['ability']['name'] for a in data['abilities'] if not a['is_hidden']), "unknown")
-
-            # --- Learnset Logic with Fallback ---
-            learnset = set()
-            found_generation = None
-
-            for version_group in FALLBACK_VERSION_GROUPS:
-                temp_learnset = set()
-                for move_data in data['moves']:
-                    for version_details in move_data['version_group_details']:
-                        if version_details['version_group']['name'] == version_group:
-                            # Add the correctly formatted, hyphenated move name
-                            temp_learnset.add(move_data['move']['name'])
-                            break # Go to the next move
-                
-                # If we found moves in this generation, we are done
-                if temp_learnset:
-                    learnset = temp_learnset
-                    found_generation = version_group
-                    print(f"  -> Success! Using learnset from '{found_generation}'.")
-                    break # Exit the fallback loop
-            
-            if not learnset:
-                print(f"  -> Warning: No moves found for {pokemon_name} in any target generations. Skipping moveset.")
-
-            # --- Assemble the dictionary ---
-            pokemon_database[pokemon_name] = {
-                "base_stats": formatted_stats,
-                "types": types,
-                "ability": ability,
-                "learnset": sorted(list(learnset))
-            }
-
-        except Exception as e:
-            print(f"  -> An error occurred while processing {pokemon_name}: {e}")
+            if found_generation:
+                print(f"({i+1}/{len(pokemon_list)}) {pokemon_name.capitalize()}: using learnset from '{found_generation}'.")
+            else:
+                print(f"({i+1}/{len(pokemon_list)}) {pokemon_name.capitalize()}: Warning, no moves found in any target generations. Skipping moveset.")
+            pokemon_database[pokemon_name] = entry
+
+    print(f"\nFetched {len(pokemon_database)}/{len(pokemon_list)} Pokémon "
+          f"({source.downloads} downloaded, {source.hits} from cache).")
+    if len(pokemon_database) < len(pokemon_list):
+        print("Some Pokémon failed; rerun to retry only the missing ones.")
 
     # --- Write data to file ---
-    file_path = "pokemon_data.py"
     print(f"\n--- Writing data to {file_path} ---")
     try:
         with open(file_path, "w") as f:
@@ -104,10 +193,20 @@ def generate_pokemon_data():
             f.write("# Contains data for Pokémon 1-493 (Gen 1-4)\n")
             f.write("POKEMON_DATABASE = ")
             f.write(json.dumps(pokemon_database, indent=4))
+        # Keep the packed database used at startup in sync with the new source
+        binary_path = os.path.splitext(file_path)[0] + ".bin"
+        build_database_file(pokemon_database, binary_path, source_digest(file_path))
         print("--- Data generation complete! ---")
     except Exception as e:
         print(f"Failed to write to file: {e}")
 
 
 if __name__ == "__main__":
-    generate_pokemon_data()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build pokemon_data.py from PokéAPI.")
+    parser.add_argument("--limit", type=int, default=POKEMON_LIMIT, help="Number of Pokémon to fetch.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Concurrent requests.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="Where raw API responses are cached.")
+    parser.add_argument("--source-dir", default=None,
+                        help="Read cached JSON from this directory instead of the network (offline).")
+    args = parser.parse_args()
+    generate_pokemon_data(args.limit, args.cache_dir, args.source_dir, args.workers)
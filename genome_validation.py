@@ -0,0 +1,91 @@
+import poke_battle_sim as pb
+from poke_battle_sim.conf import global_settings as gs
+
+from sim_runtime import ensure_simulator_started
+
+# Template species used by _genome_to_sim_pokemon for custom genomes
+CUSTOM_TEMPLATE_SPECIES = "Arceus"
+
+
+class GenomeWhitelist:
+    """
+    The gene values the battle simulator accepts for one run, resolved once
+    against its tables: learnable move names (with their simulator move ids),
+    types, natures and abilities. PokemonGenome and the crossover only draw
+    from these lists, so they never produce builds the simulator rejects.
+    The object is immutable and shared by every genome of the run.
+    """
+    def __init__(self, base_pokemon_data, config_data: dict):
+        ensure_simulator_started()
+        sim = pb.PokeSim
+        self.is_custom = (base_pokemon_data.get('name') == "custom_god_pokemon")
+
+        move_pool = config_data['MOVE_POOL'] if self.is_custom else base_pokemon_data['learnset']
+        self.move_ids = {m: sim._move_name_to_id[m] for m in move_pool if m in sim._move_name_to_id}
+        self.moves = list(self.move_ids)
+        self.rejected = {'moves': [m for m in move_pool if m not in self.move_ids]}
+
+        self.types = [t for t in config_data['POKEMON_TYPES'] if t in sim._type_to_id]
+        self.natures = [n for n in config_data['NATURES'] if n.lower() in sim._natures]
+        self.abilities = [a for a in config_data['ABILITY_POOL'] if a.lower() in sim._abilities]
+        self.rejected['types'] = [t for t in config_data['POKEMON_TYPES'] if t not in self.types]
+        self.rejected['natures'] = [n for n in config_data['NATURES'] if n not in self.natures]
+        self.rejected['abilities'] = [a for a in config_data['ABILITY_POOL'] if a not in self.abilities]
+
+        self._move_set = set(self.moves)
+        self._type_set = set(self.types)
+        self._nature_set = set(self.natures)
+        self._ability_set = {a.lower() for a in self.abilities}
+
+        # Problems shared by every genome of the run (checked once, not per genome)
+        self.species_error = None
+        species = CUSTOM_TEMPLATE_SPECIES if self.is_custom else base_pokemon_data['name']
+        if sim.get_pokemon(species) is None:
+            self.species_error = f"the simulator does not know the species '{species}'"
+        elif not self.is_custom and base_pokemon_data.get('ability') and \
+                not sim.check_ability(base_pokemon_data['ability'].lower()):
+            self.species_error = f"the simulator does not know the ability '{base_pokemon_data['ability']}'"
+        elif not self.moves:
+            self.species_error = "no learnable move is known to the simulator"
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def check(self, genome) -> str:
+        """Returns why the genome cannot be built by the simulator, or None if it can."""
+        if self.species_error:
+            return self.species_error
+        if not genome.moves or len(set(genome.moves)) != len(genome.moves):
+            return f"invalid moveset {genome.moves}"
+        unknown = [m for m in genome.moves if m not in self._move_set]
+        if unknown:
+            return f"unknown moves {unknown}"
+        if genome.nature not in self._nature_set:
+            return f"unknown nature '{genome.nature}'"
+        if sum(genome.evs.values()) > gs.EV_TOTAL_MAX or \
+                any(not gs.EV_MIN <= ev <= gs.EV_MAX for ev in genome.evs.values()):
+            return f"illegal EV spread {genome.evs}"
+        if genome.is_custom:
+            if not 1 <= len(genome.types) <= 2 or len(set(genome.types)) != len(genome.types):
+                return f"invalid type combination {genome.types}"
+            if any(t not in self._type_set for t in genome.types):
+                return f"unknown types {genome.types}"
+            if not genome.ability or genome.ability.lower() not in self._ability_set:
+                return f"unknown ability '{genome.ability}'"
+        return None
+
+    def summary(self) -> str:
+        rejected = ", ".join(f"{k}: {v}" for k, v in self.rejected.items() if v)
+        return (f"Whitelist: {len(self.moves)} moves, {len(self.types)} types, "
+                f"{len(self.natures)} natures, {len(self.abilities)} abilities"
+                + (f" (rejected {rejected})" if rejected else ""))
+
+
+def validate_population(population: list, whitelist: GenomeWhitelist) -> list:
+    """Checks every genome before evaluation. Returns [(genome, reason)] for the invalid ones."""
+    invalid = []
+    for genome in population:
+        reason = whitelist.check(genome)
+        if reason:
+            invalid.append((genome, reason))
+    return invalid
@@ -0,0 +1,200 @@
+import os
+import sys
+import math
+import queue
+import random
+import asyncio
+import itertools
+import multiprocessing
+
+import pokemon_genome
+from evolutionary_algorithm import EvolutionaryAlgorithm
+from profiling import EvolutionHooks
+
+# Genome ids of island i start at i * ISLAND_ID_STRIDE, so ids stay unique after migration
+ISLAND_ID_STRIDE = 1_000_000
+# Seconds between checks for islands that died without reporting (e.g. killed by the OOM killer)
+RESULT_POLL_INTERVAL = 1.0
+
+
+class MigrationHook(EvolutionHooks):
+    """
+    Ring migration for one island. Every `interval` generations the island sends
+    copies of its `size` fittest genomes to the next island and takes in whatever
+    migrants have already arrived from the previous one. Nothing blocks: an island
+    that is ahead simply receives its neighbour's migrants at a later exchange.
+    A channel holds one batch; while the neighbour has not taken it, newer batches
+    are dropped, so a pipe never fills up and an island that exits never leaves
+    half a batch in it for its neighbour to wait on.
+    """
+    def __init__(self, ea, index, inbox, outbox, interval, size):
+        self.ea = ea
+        self.index = index
+        self.inbox = inbox
+        self.outbox = outbox
+        self.interval = interval
+        self.size = size
+
+    def on_generation_end(self, generation, record):
+        if generation % self.interval or generation >= self.ea.config_data['GENERATIONS']:
+            return
+        try:
+            self.outbox.put_nowait((self.index, self.ea.emigrants(self.size)))
+        except queue.Full:
+            pass  # The neighbour has not taken the previous batch yet
+        migrants = []
+        while True:
+            try:
+                _, genomes = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            migrants.extend(genomes)
+        if migrants:
+            print(f"Island {self.index}: received {len(migrants)} migrants.")
+            self.ea.receive_migrants(migrants)
+
+
+class IslandReporter(EvolutionHooks):
+    """Forwards each generation record of an island to the coordinating process."""
+    def __init__(self, index, results):
+        self.index = index
+        self.results = results
+
+    def on_generation_end(self, generation, record):
+        self.results.put(("generation", self.index, record))
+
+
+def _island_main(index, base_pokemon_data, config_data, inbox, outbox, results, seed):
+    """Entry point of an island process: one full EvolutionaryAlgorithm run."""
+    # A forked island inherits the UI's stdout redirector, which nobody reads in this process
+    sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+    # Migration is best effort: never wait on exit for a neighbour that already finished
+    outbox.cancel_join_thread()
+    try:
+        random.seed(seed)
+        pokemon_genome.genome_counter = itertools.count(index * ISLAND_ID_STRIDE)
+        ea = EvolutionaryAlgorithm(base_pokemon_data, config_data)
+        ea.hooks.append(MigrationHook(
+            ea, index, inbox, outbox,
+            config_data['MIGRATION_INTERVAL'], config_data['MIGRATION_SIZE']
+        ))
+        ea.hooks.append(IslandReporter(index, results))
+        champions, history = asyncio.run(ea.run())
+        results.put(("done", index, champions))
+    except Exception as e:
+        results.put(("error", index, repr(e)))
+
+
+def _merge_records(island_records: dict) -> dict:
+    """One history entry for a generation from its {island: record}."""
+    records = list(island_records.values())
+    return {
+        'gen': records[0]['gen'],
+        'best_fitness': max(r['best_fitness'] for r in records),
+        'avg_fitness': sum(r['avg_fitness'] for r in records) / len(records),
+        'num_species': sum(r['num_species'] for r in records),
+        'islands': {i: r['best_fitness'] for i, r in island_records.items()},
+    }
+
+
+class IslandModel:
+    """
+    Runs ISLAND_COUNT independent EvolutionaryAlgorithm populations in separate
+    processes, each with POPULATION_SIZE / ISLAND_COUNT genomes, connected in a
+    ring by multiprocessing queues for migration (see MigrationHook).
+    `run()` has the same interface as EvolutionaryAlgorithm.run: it returns the
+    champions of every island and a history merged across islands.
+    `hooks` run in this process: on_generation_end gets each merged record as
+    soon as every island has finished that generation, then on_run_end.
+    """
+    def __init__(self, base_pokemon_data, config_data: dict, hooks=None):
+        self.base_pokemon_data = base_pokemon_data
+        self.config_data = config_data
+        self.island_count = config_data['ISLAND_COUNT']
+        self.history = []
+        self.hooks = list(hooks or [])
+
+    def _island_config(self, index) -> dict:
+        island_config = dict(self.config_data)
+        island_config['POPULATION_SIZE'] = max(1, math.ceil(self.config_data['POPULATION_SIZE'] / self.island_count))
+        # Each island is already one process; nested worker pools would oversubscribe the cores
+        island_config['EVALUATION_BACKEND'] = "async"
+        island_config['PROFILE_OUTPUT_DIR'] = os.path.join(
+            self.config_data.get('PROFILE_OUTPUT_DIR', "profiles"), f"island_{index}"
+        )
+        return island_config
+
+    async def run(self, progress_callback=None):
+        n = self.island_count
+        generations = self.config_data['GENERATIONS']
+        print(f"--- Starting Island Model: {n} islands of "
+              f"{self._island_config(0)['POPULATION_SIZE']} genomes, migrating "
+              f"{self.config_data['MIGRATION_SIZE']} every {self.config_data['MIGRATION_INTERVAL']} generations ---")
+
+        context = multiprocessing.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+        channels = [context.Queue(maxsize=1) for _ in range(n)]
+        results = context.Queue()
+        processes = []
+        for i in range(n):
+            # Island i reads channel i and writes to the next island's channel (ring)
+            process = context.Process(
+                target=_island_main, daemon=True,
+                args=(i, self.base_pokemon_data, self._island_config(i),
+                      channels[i], channels[(i + 1) % n], results, random.getrandbits(32))
+            )
+            process.start()
+            processes.append(process)
+
+        loop = asyncio.get_running_loop()
+        records = {}  # generation -> {island: record}
+        champions = []
+        reported = set()  # Islands that sent "done" or an error, or died
+        silent = set()    # Islands found dead at the last poll, whose last messages may still be in transit
+        if progress_callback:
+            progress_callback(0, generations * n)
+        while len(reported) < n:
+            try:
+                kind, index, payload = await loop.run_in_executor(None, results.get, True, RESULT_POLL_INTERVAL)
+            except queue.Empty:
+                # Dead for a whole poll interval with nothing left in the queue: it will never report
+                for i in silent - reported:
+                    print(f"Island {i} died without reporting (exit code {processes[i].exitcode}).")
+                    reported.add(i)
+                silent = {i for i, process in enumerate(processes) if i not in reported and not process.is_alive()}
+                continue
+            if kind == "generation":
+                records.setdefault(payload['gen'], {})[index] = payload
+                print(f"Island {index} | Gen {payload['gen']}/{generations}: "
+                      f"best {payload['best_fitness']:.2f}, avg {payload['avg_fitness']:.2f}, "
+                      f"{payload['num_species']} species")
+                if progress_callback:
+                    progress_callback(sum(len(r) for r in records.values()), generations * n)
+                if len(records[payload['gen']]) == n:
+                    for hook in self.hooks:
+                        hook.on_generation_end(payload['gen'], _merge_records(records[payload['gen']]))
+            elif kind == "done":
+                # A migrant can be the champion of two islands; keep one copy
+                known = {c.genome_id for c in champions}
+                champions.extend(c for c in payload if c.genome_id not in known)
+                reported.add(index)
+            else:
+                print(f"Island {index} failed: {payload}")
+                reported.add(index)
+
+        for process in processes:
+            process.join()
+
+        self.history.extend(_merge_records(records[gen]) for gen in sorted(records))
+        for hook in self.hooks:
+            hook.on_run_end()
+
+        print("\n--- Island Model Finished ---")
+        print(f"Found {len(champions)} champions across {n} islands for the final tournament.")
+        return champions, self.history
+
+
+def create_evolution(base_pokemon_data, config_data: dict, hooks=None):
+    """The island model when ISLAND_COUNT > 1, otherwise a single EvolutionaryAlgorithm."""
+    if config_data.get('ISLAND_COUNT', 1) > 1:
+        return IslandModel(base_pokemon_data, config_data, hooks)
+    return EvolutionaryAlgorithm(base_pokemon_data, config_data, hooks)
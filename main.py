@@ -3,7 +3,7 @@ import sys
 import nest_asyncio
 
 from ui import EvolutionApp
-from pokemon_data import POKEMON_DATABASE
+from pokemon_db import load_pokemon_database
 
 # Apply nest_asyncio once at the start
 nest_asyncio.apply()
@@ -13,7 +13,8 @@ if __name__ == "__main__":
     # We pass the database to the UI so it can populate
     # the "Choose Pokemon" dropdown.
     try:
-        app = EvolutionApp(POKEMON_DATABASE)
+        # Memory-mapped pokemon_data.bin instead of the 37k-line dict literal
+        app = EvolutionApp(load_pokemon_database())
         app.mainloop()
     except Exception as e:
         print(f"Fatal application error: {e}")
@@ -0,0 +1,213 @@
+import math
+import inspect
+import poke_battle_sim as pb
+import poke_battle_sim.util.process_move as pm
+from poke_battle_sim.conf import global_settings as gs
+
+from sim_runtime import simulator_rng
+
+# Abilities that make their holder immune to one move type
+TYPE_IMMUNITY_ABILITIES = {
+    "levitate": "ground", "flash-fire": "fire", "water-absorb": "water",
+    "dry-skin": "water", "volt-absorb": "electric", "motor-drive": "electric",
+}
+# Move.target of moves that only affect the user (Swords Dance, Roost, Protect...)
+TARGET_USER = 7
+
+AVERAGE_ROLL = 0.925    # Mean of the 0.85-1.00 damage roll
+MIN_ROLL = 0.85
+CRIT_FACTOR = 1.0625    # 1/16 chance of double damage
+
+PROBE_HP = 10 ** 6
+_HITS_PER_USE = {}      # move name -> times one use applies its damage in the simulator
+
+# Private poke-battle-sim functions the probe calls, with the parameters it passes
+# (requirements.txt pins the version they were written against)
+PROBE_FUNCTIONS = {
+    "_calculate_damage": ("attacker", "defender", "battlefield", "battle", "move_data", "skip_dmg", "skip_txt"),
+    "_process_effect": ("attacker", "defender", "battlefield", "battle", "move_data", "is_first"),
+}
+_probe_checked = False
+
+
+def _move_damage(attacker: pb.Pokemon, defender: pb.Pokemon, move, roll: float) -> float:
+    """One hit of the simulator's level-100 damage formula, on pre-battle stats (stats_actual)."""
+    if TYPE_IMMUNITY_ABILITIES.get((defender.ability or "").lower()) == move.type:
+        return 0.0
+    if move.category == gs.SPECIAL:
+        atk = attacker.stats_actual[gs.SP_ATK]
+        defn = defender.stats_actual[gs.SP_DEF]
+    else:
+        atk = attacker.stats_actual[gs.ATK]
+        defn = defender.stats_actual[gs.DEF]
+    eff = pb.PokeSim.get_type_ef(move.type, defender.types[0])
+    if defender.types[1]:
+        eff *= pb.PokeSim.get_type_ef(move.type, defender.types[1])
+    if eff == 0:
+        return 0.0
+    stab = 1.5 if move.type in attacker.types else 1.0
+    return ((0.84 * move.power * (atk / defn)) + 2) * stab * eff * roll
+
+
+def _check_probe_functions():
+    """Raises if the installed simulator no longer has the private functions the probe calls."""
+    global _probe_checked
+    for name, parameters in PROBE_FUNCTIONS.items():
+        function = getattr(pm, name, None)
+        if function is None or not set(parameters) <= set(inspect.signature(function).parameters):
+            raise RuntimeError(
+                f"MATCHUP_PREFILTER needs poke_battle_sim.util.process_move.{name}({', '.join(parameters)}), "
+                f"which the installed poke-battle-sim does not have; install the version in requirements.txt."
+            )
+    _probe_checked = True
+
+
+def _neutral_type(move_type: str) -> str:
+    """A type that takes neutral damage from move_type."""
+    return next(t for t in pb.PokeSim._type_to_id if pb.PokeSim.get_type_ef(move_type, t) == 1)
+
+
+def _hits_per_use(attacker: pb.Pokemon, defender: pb.Pokemon, move) -> int:
+    """
+    How many times one use of `move` applies its damage in poke-battle-sim.
+    Base power alone is misleading: some effect handlers deal no damage (e.g.
+    Surf, Earthquake, charging moves) and most apply it two or three times.
+    Measured once per move by comparing the damage of one
+    `_process_effect` with the simulator's own single-hit damage on a probe
+    battle (fixed seed, no crits or entry abilities) against a defender of a
+    type the move hits neutrally, so the count holds for every matchup and is
+    cached. A probe that raises counts as 0 hits and is not cached.
+    """
+    hits = _HITS_PER_USE.get(move.name)
+    if hits is not None:
+        return hits
+    if not _probe_checked:
+        _check_probe_functions()
+    from battle_evaluator import _clone_fresh_pokemon   # battle_evaluator imports this module
+
+    a, d = _clone_fresh_pokemon(attacker), _clone_fresh_pokemon(defender)
+    a.ability, d.ability = "run-away", "battle-armor"
+    battle = pb.Battle(pb.Trainer("probe_a", [a]), pb.Trainer("probe_d", [d]))
+    rng = simulator_rng()
+    state = rng.getstate()
+    rng.seed(0)
+    try:
+        battle.start()
+        battle.t1_fainted = battle.t2_fainted = False   # Set up by Battle.turn()
+        d.max_hp = d.cur_hp = PROBE_HP
+        d.types = (_neutral_type(move.type), None)      # No immunity or resistance to the move
+        probe_move = next(m for m in a.moves if m.name == move.name)
+        single = pm._calculate_damage(a, d, battle.battlefield, battle, probe_move.get_tcopy(),
+                                      skip_dmg=True, skip_txt=True)
+        rng.seed(0)
+        pm._process_effect(a, d, battle.battlefield, battle, probe_move, True)
+        hits = round((PROBE_HP - d.cur_hp) / single) if single else 0
+    except Exception:
+        return 0   # Unknown: the caller treats the move as uncertain
+    finally:
+        rng.setstate(state)
+    _HITS_PER_USE[move.name] = hits
+    return hits
+
+
+def _first_choice_score(attacker: pb.Pokemon, defender: pb.Pokemon, move) -> float:
+    """The order in which battle_evaluator._get_ordered_moves makes the AI try its moves."""
+    damage = _move_damage(attacker, defender, move, 1.0)
+    score = damage
+    if damage >= defender.max_hp:
+        score += 15000 if move.prio > 0 else 10000
+    if move.prio > 0:
+        score += 100
+    return score
+
+
+def _offense(attacker: pb.Pokemon, defender: pb.Pokemon) -> tuple:
+    """
+    (expected damage per turn of the best move, priority of a guaranteed one-hit
+    KO or None, highest priority among damaging moves, uncertain).
+    The minimax AI keeps the first of equally valued moves in damage-estimate
+    order, so it often commits to that move: only a KO by its first choice counts
+    as guaranteed, and a first choice that deals nothing makes the side uncertain.
+    `uncertain` also flags moves whose effect the estimate cannot see: fixed or
+    variable damage (no base power), damaging moves that deal nothing on their
+    first use, and status moves aimed at the opponent.
+    """
+    expected, priority, uncertain = 0.0, None, False
+    first, first_score = None, -math.inf
+    for move in attacker.moves:
+        if move.category == gs.STATUS:
+            if move.target != TARGET_USER:
+                uncertain = True
+            continue
+        if not move.power:
+            uncertain = True
+            continue
+        score = _first_choice_score(attacker, defender, move)
+        if score > first_score:
+            first, first_score = move, score
+        damage = _move_damage(attacker, defender, move, AVERAGE_ROLL)
+        if damage <= 0:
+            continue
+        hits = _hits_per_use(attacker, defender, move)
+        if not hits:
+            uncertain = True
+            continue
+        accuracy = move.acc / 100 if move.acc else 1.0
+        expected = max(expected, hits * damage * accuracy * CRIT_FACTOR)
+        priority = move.prio if priority is None else max(priority, move.prio)
+
+    ko_priority = None
+    if first is not None and (not first.acc or first.acc >= 100):
+        sure = _move_damage(attacker, defender, first, MIN_ROLL)
+        if sure > 0 and _hits_per_use(attacker, defender, first) * sure >= defender.max_hp:
+            ko_priority = first.prio
+    return expected, ko_priority, priority, uncertain
+
+
+def _acts_first(a: pb.Pokemon, a_priority, b: pb.Pokemon, b_priority) -> bool:
+    """True if `a` surely moves before `b` with its damaging moves (speed ties are not sure)."""
+    a_priority = a_priority or 0
+    b_priority = b_priority if b_priority is not None else -math.inf
+    if a_priority != b_priority:
+        return a_priority > b_priority
+    return a.stats_actual[gs.SPD] > b.stats_actual[gs.SPD]
+
+
+def predict_matchup(ours: pb.Pokemon, theirs: pb.Pokemon) -> tuple:
+    """
+    Closed-form estimate of a 1v1 battle between two freshly built Pokémon.
+    Returns (we win, confidence in [0, 1]); confidence 0 means "no idea".
+    Decided cases, most certain first:
+      * a guaranteed one-hit KO by the first choice of the side that surely moves first,
+      * one side cannot damage the other at all (type or ability immunity),
+      * otherwise the ratio of turns-to-KO, with speed breaking ties.
+    """
+    our_dmg, our_ko_prio, our_prio, our_unsure = _offense(ours, theirs)
+    their_dmg, their_ko_prio, their_prio, their_unsure = _offense(theirs, ours)
+
+    if our_ko_prio is not None and _acts_first(ours, our_ko_prio, theirs, their_prio):
+        return True, 0.98
+    if their_ko_prio is not None and _acts_first(theirs, their_ko_prio, ours, our_prio):
+        return False, 0.98
+
+    if our_dmg == 0 and their_dmg == 0:
+        return False, 0.0
+    if our_dmg == 0:
+        return False, 0.8 if our_unsure else 0.97
+    if their_dmg == 0:
+        return True, 0.8 if their_unsure else 0.97
+
+    our_turns = math.ceil(theirs.max_hp / our_dmg)
+    their_turns = math.ceil(ours.max_hp / their_dmg)
+    if our_turns == their_turns:
+        # Decided by who moves first, too close to call without simulating
+        return _acts_first(ours, our_prio, theirs, their_prio), 0.0
+    we_win = our_turns < their_turns
+    ratio = max(our_turns, their_turns) / min(our_turns, their_turns)
+    # Measured against MINIMAX_DEPTH 4 battles: the AI's move choices make turn
+    # counts a weak signal (about 75% right at best), so this stays below the
+    # default MATCHUP_PREFILTER_CONFIDENCE.
+    confidence = min(0.8, 0.5 + math.log2(ratio) / 5)
+    if our_unsure or their_unsure:
+        confidence -= 0.05
+    return we_win, confidence
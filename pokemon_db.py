@@ -0,0 +1,237 @@
+"""
+Compact, memory-mapped version of the Pokémon database.
+
+pokemon_data.py is a huge dict literal: importing it compiles (or unmarshals)
+~37k lines and materializes every entry with its full string learnset, and
+every worker process pays that again. This module packs the same data into
+`pokemon_data.bin` and exposes it through `PokemonDatabase`, a read-only
+mapping that decodes entries on access, so loading costs one mmap plus the
+species name index.
+
+File layout (little endian):
+    header   magic "MEW3DB01", u16 version, u16 record size,
+             u32 string count, u32 species count, 20-byte sha1 of pokemon_data.py
+    strings  u32 offsets[string count + 1] followed by the utf-8 blob.
+             Names, types, abilities and moves are interned in one table.
+    species  fixed-size records: name id, 6 base stats, type1, type2
+             (NO_STRING if none), ability, learnset offset, learnset length
+    learnset u16 string ids, referenced by the species records
+
+Run `python pokemon_db.py` to rebuild the file after regenerating pokemon_data.py.
+"""
+import os
+import sys
+import mmap
+import struct
+import hashlib
+from collections.abc import Mapping
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_PATH = os.path.join(DATA_DIR, "pokemon_data.py")
+BINARY_PATH = os.path.join(DATA_DIR, "pokemon_data.bin")
+
+MAGIC = b"MEW3DB01"
+VERSION = 1
+STAT_KEYS = ("hp", "atk", "def", "spa", "spd", "spe")
+NO_STRING = 0xFFFF
+
+_HEADER = struct.Struct("<8sHHII20s")
+_RECORD = struct.Struct("<H6HHHHIH")
+
+
+def source_digest(source_path=SOURCE_PATH) -> bytes:
+    with open(source_path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def build_database_file(database: dict, path=BINARY_PATH, digest=b"\0" * 20):
+    """Packs a POKEMON_DATABASE-style dict into the binary format."""
+    strings = []
+    string_ids = {}
+
+    def intern(s):
+        if s not in string_ids:
+            string_ids[s] = len(strings)
+            strings.append(s)
+        return string_ids[s]
+
+    records = []
+    learnset_ids = []
+    for name, entry in database.items():
+        types = entry["types"]
+        record = (
+            intern(name),
+            *(entry["base_stats"][k] for k in STAT_KEYS),
+            intern(types[0]),
+            intern(types[1]) if len(types) > 1 else NO_STRING,
+            intern(entry["ability"]),
+            len(learnset_ids),
+            len(entry["learnset"]),
+        )
+        learnset_ids.extend(intern(move) for move in entry["learnset"])
+        records.append(record)
+
+    if len(strings) >= NO_STRING:
+        raise ValueError("Too many distinct strings for 16-bit ids.")
+
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = [0]
+    for blob in encoded:
+        offsets.append(offsets[-1] + len(blob))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, _RECORD.size, len(strings), len(records), digest))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(b"".join(encoded))
+        for record in records:
+            f.write(_RECORD.pack(*record))
+        f.write(struct.pack(f"<{len(learnset_ids)}H", *learnset_ids))
+    os.replace(tmp_path, path)
+
+
+class PokemonDatabase(Mapping):
+    """
+    Read-only, POKEMON_DATABASE-compatible view over `pokemon_data.bin`.
+    Keys keep the original order. Species are decoded only when first looked
+    up, and every string is decoded once and shared, so all learnsets point
+    at the same move name objects. Each lookup still returns a fresh entry
+    dict, so callers may mutate what they get back (the UI adds a 'name' key).
+    """
+    def __init__(self, path=BINARY_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, n_strings, n_species, self.source_digest = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION or record_size != _RECORD.size:
+            raise ValueError(f"{path} is not a compatible Pokémon database file.")
+
+        pos = _HEADER.size
+        self._string_offsets = struct.unpack_from(f"<{n_strings + 1}I", self._buf, pos)
+        pos += 4 * (n_strings + 1)
+        self._strings_start = pos
+        pos += self._string_offsets[-1]
+        self._records_start = pos
+        self._learnsets_start = pos + n_species * _RECORD.size
+
+        self._strings = [None] * n_strings  # Decoded on demand, shared by every entry
+        self._string_ids = None             # Reverse table, built on first move_id()
+        self._records = {}                  # Record index -> decoded species (cache)
+        self._intersections = {}            # (species, move pool) -> moves in both
+
+        # The only thing decoded eagerly: species name -> record index.
+        self._index = {}
+        for i in range(n_species):
+            name_id = struct.unpack_from("<H", self._buf, self._records_start + i * _RECORD.size)[0]
+            self._index[self._string(name_id)] = i
+
+    def __reduce__(self):
+        # mmaps cannot be pickled; worker processes simply map the file again
+        return (PokemonDatabase, (self.path,))
+
+    def _string(self, string_id: int) -> str:
+        s = self._strings[string_id]
+        if s is None:
+            start = self._strings_start + self._string_offsets[string_id]
+            end = self._strings_start + self._string_offsets[string_id + 1]
+            s = self._strings[string_id] = sys.intern(self._buf[start:end].decode("utf-8"))
+        return s
+
+    def _record(self, name: str) -> tuple:
+        """Decodes (and caches) one species as (stats, types, ability id, learnset ids)."""
+        index = self._index[name]
+        record = self._records.get(index)
+        if record is None:
+            fields = _RECORD.unpack_from(self._buf, self._records_start + index * _RECORD.size)
+            type1, type2, ability, learnset_offset, learnset_len = fields[7:]
+            move_ids = struct.unpack_from(
+                f"<{learnset_len}H", self._buf, self._learnsets_start + 2 * learnset_offset
+            )
+            types = (type1,) if type2 == NO_STRING else (type1, type2)
+            record = self._records[index] = (fields[1:7], types, ability, move_ids)
+        return record
+
+    def __getitem__(self, name: str) -> dict:
+        stats, types, ability, move_ids = self._record(name)
+        return {
+            "base_stats": dict(zip(STAT_KEYS, stats)),
+            "types": [self._string(t) for t in types],
+            "ability": self._string(ability),
+            "learnset": [self._string(m) for m in move_ids],
+        }
+
+    # --- Interned move ids ---
+    # Ids index the shared string table, so they are stable for a given file
+    # and identical across every species' learnset.
+
+    def move_id(self, move: str):
+        """Returns the interned id of a move name, or None if no species learns it."""
+        if self._string_ids is None:
+            self._string_ids = {self._string(i): i for i in range(len(self._strings))}
+        return self._string_ids.get(move)
+
+    def move_name(self, move_id: int) -> str:
+        return self._string(move_id)
+
+    def learnset_ids(self, name: str) -> tuple:
+        """The species' learnset as a tuple of interned move ids (no strings decoded)."""
+        return self._record(name)[3]
+
+    def pool_intersection(self, name: str, move_pool) -> list:
+        """
+        Moves of the species' learnset that are also in move_pool (e.g. config.MOVE_POOL),
+        in learnset order. Computed once per (species, pool) and reused.
+        """
+        key = (name, tuple(move_pool))
+        moves = self._intersections.get(key)
+        if moves is None:
+            pool_ids = {self.move_id(m) for m in move_pool}
+            moves = [self._string(m) for m in self.learnset_ids(name) if m in pool_ids]
+            self._intersections[key] = moves
+        return list(moves)
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def close(self):
+        self._buf.close()
+
+
+def rebuild_database_file(path=BINARY_PATH, source_path=SOURCE_PATH):
+    """Imports pokemon_data.py once and writes the packed file next to it."""
+    from pokemon_data import POKEMON_DATABASE
+    build_database_file(POKEMON_DATABASE, path, source_digest(source_path))
+
+
+def load_pokemon_database(path=BINARY_PATH, source_path=SOURCE_PATH):
+    """
+    Returns the fast PokemonDatabase, rebuilding the packed file first if it
+    is missing or was built from a different pokemon_data.py. Falls back to
+    the plain dict from pokemon_data.py if the file cannot be used.
+    """
+    try:
+        digest = source_digest(source_path) if os.path.exists(source_path) else None
+        if not os.path.exists(path):
+            rebuild_database_file(path, source_path)
+        db = PokemonDatabase(path)
+        if digest is not None and db.source_digest != digest:
+            db.close()
+            print(f"{os.path.basename(path)} is out of date, rebuilding it...")
+            rebuild_database_file(path, source_path)
+            db = PokemonDatabase(path)
+        return db
+    except (OSError, ValueError, struct.error) as e:
+        print(f"Could not use {path} ({e}), falling back to pokemon_data.py.")
+        from pokemon_data import POKEMON_DATABASE
+        return POKEMON_DATABASE
+
+
+if __name__ == "__main__":
+    rebuild_database_file()
+    print(f"--- Wrote {BINARY_PATH} ({os.path.getsize(BINARY_PATH)} bytes) ---")
@@ -4,12 +4,21 @@ import itertools
 genome_counter = itertools.count()
 
 class PokemonGenome:
-    def __init__(self, base_pokemon_data, config_data: dict, random_init=True):
+    def __init__(self, base_pokemon_data, config_data: dict, random_init=True, whitelist=None):
         self.genome_id = next(genome_counter)   # Unique genome identifier
         self.fitness = 0    # Overall fitness score
         self.shared_fitness = 0 # Fitness adjusted for species sharing
+        self.search_stats = None    # SearchStats of the last evaluation (if collected)
+        self.battle_search_stats = []   # Per-battle (opponent name, SearchStats)
+        self.battle_replays = []    # Per-battle (opponent info, battle index, result with "replay"), see battle_replay
+        self.matchup_results = None # {opponent name: {"opponent", "battles", "wins", "turns", "hp_margin"}}
+        self.results_fingerprint = None # fingerprint() the results were measured with
+        self.prefiltered_battles = 0    # Battles of the last evaluation decided without simulating
+        self.predicted_fitness = None   # Surrogate estimate, set when it was screened
         
         self.config_data = config_data
+        # GenomeWhitelist of simulator-valid genes; None means the raw config pools
+        self.whitelist = whitelist
         
         # Determine if this is a custom Pokemon
         self.is_custom = (base_pokemon_data.get('name') == "custom_god_pokemon")
@@ -19,7 +28,7 @@ class PokemonGenome:
             self.name = "Mewthree" 
             self.ability = None
             # Get data pools from config
-            self.learnset = self.config_data['MOVE_POOL'] 
+            self.learnset = whitelist.moves if whitelist else self.config_data['MOVE_POOL'] 
             
             self.stats = {"hp": 0, "atk": 0, "def": 0, "spa": 0, "spd": 0, "spe": 0}
             self.types = [] 
@@ -27,29 +36,38 @@ class PokemonGenome:
             
             if random_init:
                 self._randomize_stats()
-                self.types = random.sample(self.config_data['POKEMON_TYPES'], random.randint(1, 2))
+                self.types = random.sample(self._type_pool(), random.randint(1, 2))
                 self.moves = random.sample(self.learnset, 4)
                 self._randomize_evs()
-                self.nature = random.choice(list(self.config_data['NATURES'].keys()))
-                self.ability = random.choice(self.config_data['ABILITY_POOL'])
+                self.nature = random.choice(self._nature_pool())
+                self.ability = random.choice(self._ability_pool())
         else:
             self.name = base_pokemon_data['name']
             self.stats = base_pokemon_data['base_stats']
             self.types = base_pokemon_data['types']
             self.ability = base_pokemon_data['ability']
-            self.learnset = base_pokemon_data['learnset']
+            self.learnset = whitelist.moves if whitelist else base_pokemon_data['learnset']
             self.moves = [] 
             
             if random_init:
                 self.moves = random.sample(self.learnset, min(4, len(self.learnset)))
                 self._randomize_evs()
-                self.nature = random.choice(list(self.config_data['NATURES'].keys()))
+                self.nature = random.choice(self._nature_pool())
         
         # Ensure moves and types are sorted for consistency
         self.moves.sort()
         self.types.sort()
 
 
+    def _type_pool(self) -> list:
+        return self.whitelist.types if self.whitelist else self.config_data['POKEMON_TYPES']
+
+    def _nature_pool(self) -> list:
+        return self.whitelist.natures if self.whitelist else list(self.config_data['NATURES'].keys())
+
+    def _ability_pool(self) -> list:
+        return self.whitelist.abilities if self.whitelist else self.config_data['ABILITY_POOL']
+
     def _normalize_dict(self, data_dict, max_sum):
         """Normalizes the values in data_dict so that they sum to max_sum"""
         current_sum = sum(data_dict.values())
@@ -94,6 +112,58 @@ class PokemonGenome:
         remaining_keys = [k for k in keys if k not in [stat1, stat2]]
         self.evs[random.choice(remaining_keys)] = 6
 
+    def fingerprint(self) -> tuple:
+        """Hashable summary of everything that affects the built battle Pokémon."""
+        return (
+            self.name, self.is_custom, tuple(self.types), tuple(self.stats.items()),
+            self.ability, self.nature, tuple(self.moves), tuple(self.evs.items())
+        )
+
+    @property
+    def matchup_wins(self):
+        """{opponent name: wins} of the stored per-opponent results (None if not evaluated)."""
+        if self.matchup_results is None:
+            return None
+        return {name: result["wins"] for name, result in self.matchup_results.items()}
+
+    def clear_results(self):
+        """Forgets the stored per-opponent results, so the next evaluation battles every opponent."""
+        self.matchup_results = None
+        self.results_fingerprint = None
+
+    def to_dict(self, include_results=False) -> dict:
+        """The genes as plain JSON-serializable data (see from_dict), optionally with their still valid results."""
+        data = {
+            'genome_id': self.genome_id, 'name': self.name, 'is_custom': self.is_custom,
+            'types': list(self.types), 'stats': dict(self.stats), 'ability': self.ability,
+            'nature': self.nature, 'moves': list(self.moves), 'evs': dict(self.evs),
+        }
+        if include_results and self.matchup_results and self.results_fingerprint == self.fingerprint():
+            data['matchup_results'] = self.matchup_results
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict, config_data: dict) -> "PokemonGenome":
+        """Rebuilds a genome sent with to_dict(), e.g. by a remote evaluation worker."""
+        if data['is_custom']:
+            base = {'name': "custom_god_pokemon"}
+        else:
+            base = {'name': data['name'], 'base_stats': data['stats'], 'types': data['types'],
+                    'ability': data['ability'], 'learnset': data['moves']}
+        genome = cls(base, config_data, random_init=False)
+        genome.genome_id = data['genome_id']
+        genome.name = data['name']
+        genome.types = list(data['types'])
+        genome.stats = dict(data['stats'])
+        genome.ability = data['ability']
+        genome.nature = data['nature']
+        genome.moves = list(data['moves'])
+        genome.evs = dict(data['evs'])
+        if data.get('matchup_results'):
+            genome.matchup_results = data['matchup_results']
+            genome.results_fingerprint = genome.fingerprint()
+        return genome
+
     def mutate(self):
         """Applies a random mutation to the evolvable parts of the genome."""
         evolvable_parts = ['evs', 'moves', 'nature']
@@ -114,7 +184,7 @@ class PokemonGenome:
             # Replace one type with a new random type
             if self.types:
                 idx_to_replace = random.randint(0, len(self.types) - 1)
-                new_type = random.choice([t for t in self.config_data['POKEMON_TYPES'] if t not in self.types])
+                new_type = random.choice([t for t in self._type_pool() if t not in self.types])
                 self.types[idx_to_replace] = new_type
             self.types.sort()
 
@@ -131,13 +201,12 @@ class PokemonGenome:
             self.moves.sort()
 
         elif mutation_type == 'nature':
-            # Use config value
-            self.nature = random.choice(list(self.config_data['NATURES'].keys()))
+            self.nature = random.choice(self._nature_pool())
         
         elif mutation_type == 'ability':
             # Find a new ability that is not the current one
             possible_new_abilities = [
-                a for a in self.config_data['ABILITY_POOL'] if a != self.ability
+                a for a in self._ability_pool() if a != self.ability
             ]
             if possible_new_abilities:
                 self.ability = random.choice(possible_new_abilities)
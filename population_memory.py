@@ -0,0 +1,151 @@
+import numpy as np
+from multiprocessing import shared_memory
+
+from pokemon_genome import PokemonGenome
+
+STAT_KEYS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+# Columns of a genome row (int32)
+GENOME_ID = 0
+STATS = slice(1, 7)
+EVS = slice(7, 13)
+MOVES = slice(13, 17)   # Simulator move ids, 0 = empty slot
+TYPES = slice(17, 19)   # Index in PopulationCodec.types, -1 = no second type
+NATURE = 19
+ABILITY = 20            # Index in PopulationCodec.abilities, -1 = none
+ROW_WIDTH = 21
+
+# Fields of a battle result (float64); NaN until the battle has been played
+WON, TURNS, HP_MARGIN = 0, 1, 2
+RESULT_WIDTH = 3
+
+
+class PopulationCodec:
+    """
+    Maps the genes of one run to small integers and back, using the run's
+    GenomeWhitelist as the vocabulary (moves by their simulator move id).
+    The species part that never mutates (name, and for a standard species its
+    base stats, types and ability) is kept here instead of in every row.
+    """
+    def __init__(self, whitelist, base_pokemon_data: dict):
+        self.is_custom = whitelist.is_custom
+        self.name = "Mewthree" if self.is_custom else base_pokemon_data['name']
+        self.move_ids = dict(whitelist.move_ids)
+        self.move_names = {move_id: name for name, move_id in self.move_ids.items()}
+        self.types = list(whitelist.types)
+        self.natures = list(whitelist.natures)
+        self.abilities = list(whitelist.abilities)
+        if not self.is_custom:
+            self.types += [t for t in base_pokemon_data['types'] if t not in self.types]
+            if base_pokemon_data.get('ability') not in self.abilities:
+                self.abilities.append(base_pokemon_data['ability'])
+        self._type_index = {t: i for i, t in enumerate(self.types)}
+        self._nature_index = {n: i for i, n in enumerate(self.natures)}
+        self._ability_index = {a: i for i, a in enumerate(self.abilities)}
+
+    def encode(self, genome: PokemonGenome, row: np.ndarray) -> bool:
+        """Writes the genome into the row; False if a gene is outside the vocabulary."""
+        if len(genome.moves) > 4 or len(genome.types) > 2 or genome.name != self.name \
+                or not set(genome.stats) <= set(STAT_KEYS) or not set(genome.evs) <= set(STAT_KEYS):
+            return False
+        try:
+            moves = [self.move_ids[m] for m in genome.moves]
+            types = [self._type_index[t] for t in genome.types]
+            nature = self._nature_index[genome.nature]
+            ability = self._ability_index[genome.ability] if genome.ability is not None else -1
+        except KeyError:
+            return False
+        row[GENOME_ID] = genome.genome_id
+        row[STATS] = [genome.stats.get(k, 0) for k in STAT_KEYS]
+        row[EVS] = [genome.evs.get(k, 0) for k in STAT_KEYS]
+        row[MOVES] = moves + [0] * (4 - len(moves))
+        row[TYPES] = types + [-1] * (2 - len(types))
+        row[NATURE] = nature
+        row[ABILITY] = ability
+        return True
+
+    def decode(self, row: np.ndarray) -> dict:
+        """The genome of a row in PokemonGenome.to_dict() form."""
+        return {
+            'genome_id': int(row[GENOME_ID]), 'name': self.name, 'is_custom': self.is_custom,
+            'types': [self.types[i] for i in row[TYPES] if i >= 0],
+            'stats': dict(zip(STAT_KEYS, map(int, row[STATS]))),
+            'ability': self.abilities[row[ABILITY]] if row[ABILITY] >= 0 else None,
+            'nature': self.natures[row[NATURE]],
+            'moves': [self.move_names[m] for m in row[MOVES] if m],
+            'evs': dict(zip(STAT_KEYS, map(int, row[EVS]))),
+        }
+
+
+class SharedPopulation:
+    """
+    The genomes being evaluated and their battle results, in one
+    multiprocessing.shared_memory block, so process-pool tasks are just
+    (slot, battles) integers instead of pickled genomes.
+
+    `genomes` is a (capacity, ROW_WIDTH) int32 array of encoded genomes;
+    `results` a (capacity, gauntlet size, battles per opponent, RESULT_WIDTH)
+    float64 array that workers write each battle's won/turns/HP margin into.
+    The parent owns the block; workers attach to it (forked workers inherit
+    the mapping, spawned ones reattach by name when unpickled).
+    """
+    def __init__(self, codec: PopulationCodec, capacity: int, opponents: int, battles: int):
+        self.codec = codec
+        self.shape = (capacity, opponents, battles)
+        self.owner = True
+        self.memory = shared_memory.SharedMemory(create=True, size=self._size())
+        self._map()
+        self.free_slots = list(range(capacity))
+
+    def _size(self) -> int:
+        capacity, opponents, battles = self.shape
+        return self._results_offset() + capacity * opponents * battles * RESULT_WIDTH * 8
+
+    def _results_offset(self) -> int:
+        return -(-self.shape[0] * ROW_WIDTH * 4 // 8) * 8   # Genome rows, padded to 8 bytes
+
+    def _map(self):
+        capacity, opponents, battles = self.shape
+        self.genomes = np.ndarray((capacity, ROW_WIDTH), dtype=np.int32, buffer=self.memory.buf)
+        self.results = np.ndarray((capacity, opponents, battles, RESULT_WIDTH), dtype=np.float64,
+                                  buffer=self.memory.buf, offset=self._results_offset())
+
+    def __getstate__(self):
+        return {"codec": self.codec, "shape": self.shape, "name": self.memory.name}
+
+    def __setstate__(self, state):
+        self.codec, self.shape = state["codec"], state["shape"]
+        self.owner = False
+        self.memory = shared_memory.SharedMemory(name=state["name"])
+        self._map()
+        self.free_slots = []
+
+    def acquire(self, genome: PokemonGenome):
+        """Stores the genome in a free slot with cleared results; None if full or not encodable."""
+        if not self.free_slots:
+            return None
+        slot = self.free_slots.pop()
+        if not self.codec.encode(genome, self.genomes[slot]):
+            self.free_slots.append(slot)
+            return None
+        self.results[slot] = np.nan
+        return slot
+
+    def release(self, slot: int):
+        self.free_slots.append(slot)
+
+    def read_genome(self, slot: int, config_data: dict) -> PokemonGenome:
+        return PokemonGenome.from_dict(self.codec.decode(self.genomes[slot]), config_data)
+
+    def write_result(self, slot: int, opponent: int, battle: int, result: dict):
+        self.results[slot, opponent, battle] = (result["won"], result["turns"], result["hp_margin"])
+
+    def read_result(self, slot: int, opponent: int, battle: int) -> dict:
+        won, turns, hp_margin = self.results[slot, opponent, battle]
+        return {"won": bool(won), "turns": int(turns), "hp_margin": float(hp_margin)}
+
+    def close(self):
+        self.genomes = self.results = None  # Views must go before the buffer can be released
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
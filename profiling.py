@@ -0,0 +1,198 @@
+import os
+import sys
+import time
+import cProfile
+import pstats
+import threading
+from collections import Counter
+
+# Phases reported by EvolutionaryAlgorithm.run, in the order they happen.
+# 'deepcopy' is nested inside 'bookkeeping' and 'reproduction'.
+PHASES = ("validation", "evaluation", "surrogate", "speciation", "fitness_sharing", "offspring_allocation",
+          "bookkeeping", "reproduction", "deepcopy")
+
+
+class EvolutionHooks:
+    """
+    Observer interface for EvolutionaryAlgorithm.run.
+    Subclass it and override only the callbacks you need; every method is a no-op here.
+    """
+    def on_generation_start(self, generation: int):
+        pass
+
+    def on_phase_start(self, phase: str, generation: int):
+        pass
+
+    def on_phase_end(self, phase: str, generation: int, elapsed: float):
+        pass
+
+    def on_genome_evaluated(self, genome, generation: int):
+        pass
+
+    def on_generation_end(self, generation: int, record: dict):
+        pass
+
+    def on_run_end(self):
+        pass
+
+
+class PhaseTimer(EvolutionHooks):
+    """Accumulates wall time per phase and prints a one-line breakdown per generation."""
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.current = {}
+        self.per_generation = []
+
+    def on_generation_start(self, generation):
+        self.current = {}
+
+    def on_phase_end(self, phase, generation, elapsed):
+        self.current[phase] = self.current.get(phase, 0.0) + elapsed
+
+    def on_generation_end(self, generation, record):
+        record['phase_times'] = dict(self.current)
+        self.per_generation.append((generation, dict(self.current)))
+        if self.verbose and self.current:
+            parts = " | ".join(f"{p}: {t:.2f}s" for p, t in self.current.items())
+            print(f"Phase times: {parts}")
+
+
+class CProfileHook(EvolutionHooks):
+    """
+    Profiles each generation with cProfile and writes `gen_XXX.prof` into output_dir
+    (`gen_XXX_partial.prof` for a generation the run stopped in).
+    Only the thread running the event loop is profiled.
+    """
+    def __init__(self, output_dir="profiles", top=0):
+        self.output_dir = output_dir
+        self.top = top
+        self.profiler = None
+        self.generation = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def on_generation_start(self, generation):
+        self.generation = generation
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def _write(self, name: str) -> str:
+        self.profiler.disable()
+        path = os.path.join(self.output_dir, f"{name}.prof")
+        self.profiler.dump_stats(path)
+        print(f"Profile written to {path}")
+        if self.top:
+            stats = pstats.Stats(self.profiler, stream=sys.stdout)
+            stats.sort_stats("cumulative").print_stats(self.top)
+        self.profiler = None
+        return path
+
+    def on_generation_end(self, generation, record):
+        if not self.profiler: return
+        record['profile'] = self._write(f"gen_{generation:03d}")
+
+    def on_run_end(self):
+        if self.profiler:
+            self._write(f"gen_{self.generation:03d}_partial")
+
+
+class SamplingProfilerHook(EvolutionHooks):
+    """
+    Low-overhead statistical profiler. A daemon thread samples the stack of the
+    thread that started the generation every `interval` seconds and writes
+    `gen_XXX.folded` (one "frame;frame;frame count" line per stack), the input
+    format of flamegraph.pl and speedscope. A generation the run stopped in is
+    written to `gen_XXX_partial.folded`.
+    """
+    def __init__(self, output_dir="profiles", interval=0.005):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = None
+        self._thread = None
+        self.generation = 0
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def _sample(self, target_id, stop):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(target_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def on_generation_start(self, generation):
+        self.generation = generation
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(), self._stop), daemon=True
+        )
+        self._thread.start()
+
+    def _stop_sampling(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _write(self, name: str) -> str:
+        path = os.path.join(self.output_dir, f"{name}.folded")
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        print(f"Sampled profile ({sum(self.samples.values())} samples) written to {path}")
+        return path
+
+    def on_generation_end(self, generation, record):
+        self._stop_sampling()
+        record['profile'] = self._write(f"gen_{generation:03d}")
+
+    def on_run_end(self):
+        if self._thread:
+            self._stop_sampling()
+            self._write(f"gen_{self.generation:03d}_partial")
+
+
+def build_hooks(config_data: dict) -> list:
+    """Creates the built-in hooks enabled in config_data."""
+    hooks = []
+    if config_data.get('LOG_PHASE_TIMINGS', False):
+        hooks.append(PhaseTimer())
+    profile_mode = config_data.get('PROFILE_MODE')
+    output_dir = config_data.get('PROFILE_OUTPUT_DIR', "profiles")
+    if profile_mode == "cprofile":
+        hooks.append(CProfileHook(output_dir))
+    elif profile_mode == "sampling":
+        hooks.append(SamplingProfilerHook(output_dir))
+    elif profile_mode:
+        print(f"Unknown PROFILE_MODE '{profile_mode}', profiling disabled.")
+    return hooks
+
+
+class _PhaseContext:
+    """Context manager used by EvolutionaryAlgorithm to report a phase to its hooks."""
+    __slots__ = ("hooks", "phase", "generation", "start")
+
+    def __init__(self, hooks, phase, generation):
+        self.hooks = hooks
+        self.phase = phase
+        self.generation = generation
+
+    def __enter__(self):
+        for hook in self.hooks:
+            hook.on_phase_start(self.phase, self.generation)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        for hook in self.hooks:
+            hook.on_phase_end(self.phase, self.generation, elapsed)
+        return False
+
+
+def phase(hooks: list, name: str, generation: int) -> _PhaseContext:
+    return _PhaseContext(hooks, name, generation)
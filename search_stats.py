@@ -0,0 +1,91 @@
+class SearchStats:
+    """
+    Counters collected by the minimax search.
+    One object is filled per battle; battles are merged into the genome's
+    totals, and genomes are merged into the generation totals.
+    When collection is disabled no object is created and the search only
+    pays for a `None` check per node.
+    """
+    __slots__ = (
+        "battles", "decisions", "root_moves", "nodes", "leaf_evals",
+        "cutoffs", "turn_errors", "nodes_per_depth", "time_per_depth",
+        "search_time"
+    )
+
+    def __init__(self):
+        self.battles = 0
+        self.decisions = 0      # Calls to get_best_move_minimax that searched
+        self.root_moves = 0     # Moves tried at the root of those searches
+        self.nodes = 0          # Calls to _minimax_ab (leaves included)
+        self.leaf_evals = 0     # Calls that ended in the static evaluation
+        self.cutoffs = 0        # Alpha-beta cutoffs
+        self.turn_errors = 0    # Simulated turns that raised and were skipped
+        # Remaining depth (MINIMAX_DEPTH at the root, 1 at the last ply)
+        # -> number of simulated turns / seconds spent cloning and simulating
+        self.nodes_per_depth = {}
+        self.time_per_depth = {}
+        self.search_time = 0.0
+
+    def add_ply(self, depth: int, elapsed: float):
+        self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + 1
+        self.time_per_depth[depth] = self.time_per_depth.get(depth, 0.0) + elapsed
+
+    def merge(self, other: "SearchStats"):
+        """Adds the counters of `other` into this object."""
+        if other is None: return self
+        self.battles += other.battles
+        self.decisions += other.decisions
+        self.root_moves += other.root_moves
+        self.nodes += other.nodes
+        self.leaf_evals += other.leaf_evals
+        self.cutoffs += other.cutoffs
+        self.turn_errors += other.turn_errors
+        self.search_time += other.search_time
+        for depth, count in other.nodes_per_depth.items():
+            self.nodes_per_depth[depth] = self.nodes_per_depth.get(depth, 0) + count
+        for depth, elapsed in other.time_per_depth.items():
+            self.time_per_depth[depth] = self.time_per_depth.get(depth, 0.0) + elapsed
+        return self
+
+    def branching_factor(self) -> float:
+        """Average number of children per interior node."""
+        interior = self.nodes - self.leaf_evals
+        if interior <= 0: return 0.0
+        return (self.nodes - self.root_moves) / interior
+
+    def as_dict(self) -> dict:
+        return {
+            "battles": self.battles,
+            "decisions": self.decisions,
+            "root_moves": self.root_moves,
+            "nodes": self.nodes,
+            "leaf_evals": self.leaf_evals,
+            "cutoffs": self.cutoffs,
+            "turn_errors": self.turn_errors,
+            "branching_factor": self.branching_factor(),
+            "nodes_per_depth": dict(sorted(self.nodes_per_depth.items(), reverse=True)),
+            "time_per_depth": dict(sorted(self.time_per_depth.items(), reverse=True)),
+            "search_time": self.search_time,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SearchStats":
+        """Inverse of as_dict, also after a JSON round trip (which turns the depth keys into strings)."""
+        stats = cls()
+        for name in ("battles", "decisions", "root_moves", "nodes", "leaf_evals", "cutoffs", "turn_errors", "search_time"):
+            setattr(stats, name, data[name])
+        stats.nodes_per_depth = {int(depth): count for depth, count in data["nodes_per_depth"].items()}
+        stats.time_per_depth = {int(depth): elapsed for depth, elapsed in data["time_per_depth"].items()}
+        return stats
+
+    def summary(self) -> str:
+        per_depth = ", ".join(
+            f"d{depth}: {self.nodes_per_depth[depth]} ({self.time_per_depth[depth]:.2f}s)"
+            for depth in sorted(self.nodes_per_depth, reverse=True)
+        )
+        return (f"Battles: {self.battles} | Decisions: {self.decisions} | "
+                f"Nodes: {self.nodes} | Leaves: {self.leaf_evals} | "
+                f"Cutoffs: {self.cutoffs} | Turn errors: {self.turn_errors} | "
+                f"Branching: {self.branching_factor():.2f} | "
+                f"Search time: {self.search_time:.2f}s\n"
+                f"Simulated turns per depth: {per_depth or 'n/a'}")
@@ -0,0 +1,110 @@
+import os
+import sys
+import random
+import importlib
+import threading
+import poke_battle_sim as pb
+
+# PokeSim keeps all of its data (Pokémon, moves, natures, type chart,
+# abilities, items) in these class-level tables, filled by PokeSim.start().
+SIMULATOR_TABLES = (
+    "_pokemon_stats", "_name_to_id", "_natures", "_nature_list",
+    "_move_list", "_move_name_to_id", "_type_effectives", "_type_to_id",
+    "_ability_list", "_abilities", "_item_list", "_items",
+)
+
+# Simulator modules that bound `from random import randrange` at import time,
+# i.e. every random draw of a battle
+SIMULATOR_RNG_MODULES = (
+    "poke_battle_sim.core.battle", "poke_battle_sim.core.pokemon",
+    "poke_battle_sim.util.process_move", "poke_battle_sim.util.process_ability",
+    "poke_battle_sim.util.process_item",
+)
+
+_started_pid = None
+_start_lock = threading.Lock()
+_global_rng = random.randrange.__self__
+_thread_rng = threading.local()
+_per_thread_rng = False
+
+
+def ensure_simulator_started():
+    """
+    Loads the simulator data exactly once per process.
+    Safe to call from every evaluation: after the first call it is a pid check.
+    A forked worker inherits the parent's tables and only records its own pid.
+    """
+    global _started_pid
+    pid = os.getpid()
+    if _started_pid == pid:
+        return
+    with _start_lock:
+        if _started_pid != pid:
+            pb.PokeSim.start()
+            _started_pid = pid
+
+
+def simulator_snapshot() -> dict:
+    """
+    The loaded simulator tables, for handing to worker processes that do not fork
+    (spawn/forkserver) so they can skip re-reading and re-parsing the CSV files.
+    """
+    ensure_simulator_started()
+    return {name: getattr(pb.PokeSim, name) for name in SIMULATOR_TABLES}
+
+
+def restore_simulator_snapshot(snapshot: dict):
+    """Installs tables produced by simulator_snapshot() in this process."""
+    global _started_pid
+    with _start_lock:
+        for name, value in snapshot.items():
+            setattr(pb.PokeSim, name, value)
+        _started_pid = os.getpid()
+
+
+def worker_initializer(snapshot=None):
+    """
+    Initializer for process pools. Forked workers already share the parent's
+    prewarmed tables (pass no snapshot); spawned workers receive the snapshot.
+    """
+    if snapshot:
+        restore_simulator_snapshot(snapshot)
+    else:
+        ensure_simulator_started()
+
+
+def gil_disabled() -> bool:
+    """True on a free-threaded interpreter running without the GIL (Python 3.13t+)."""
+    return not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def simulator_rng() -> random.Random:
+    """
+    The Random instance the simulator draws from in this thread: the global one,
+    or after use_thread_local_rng() one per thread. Battles seed and restore it.
+    """
+    if not _per_thread_rng:
+        return _global_rng
+    rng = getattr(_thread_rng, "rng", None)
+    if rng is None:
+        rng = _thread_rng.rng = random.Random()
+    return rng
+
+
+def _thread_randrange(*args):
+    return simulator_rng().randrange(*args)
+
+
+def use_thread_local_rng():
+    """
+    Gives every thread its own simulator RNG, so battles running in parallel
+    threads neither share nor re-seed each other's random stream.
+    Called once by the thread backend, before its threads start battling.
+    """
+    global _per_thread_rng
+    with _start_lock:
+        if _per_thread_rng:
+            return
+        for name in SIMULATOR_RNG_MODULES:
+            importlib.import_module(name).randrange = _thread_randrange
+        _per_thread_rng = True
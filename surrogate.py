@@ -0,0 +1,174 @@
+import math
+import numpy as np
+
+from battle_evaluator import BATTLES_PER_OPPONENT
+
+STAT_KEYS = ("hp", "atk", "def", "spa", "spd", "spe")
+
+
+class SurrogateModel:
+    """
+    Cheap fitness predictor used to pre-screen offspring (SURROGATE_SCREENING).
+
+    A ridge regression maps genome features (EV spread, nature modifiers, move
+    multi-hot, and for custom genomes base stats, types and ability) to the win
+    rate against every gauntlet opponent, trained on the per-opponent results of
+    all genomes evaluated so far in the run. The predicted fitness is the
+    expected 1000/250/100 score of those win rates, so it follows the real
+    scoring. `screen()` keeps only the best predicted fraction of the candidates.
+    """
+    def __init__(self, whitelist, config_data: dict):
+        self.screen_fraction = config_data.get('SURROGATE_SCREEN_FRACTION', 0.5)
+        self.min_samples = config_data.get('SURROGATE_MIN_SAMPLES', 50)
+        self.max_samples = config_data.get('SURROGATE_MAX_SAMPLES', 2000)
+        self.ridge = config_data.get('SURROGATE_RIDGE', 1.0)
+        self.score_per_win = config_data['SCORE_PER_WIN'][:BATTLES_PER_OPPONENT]
+        self.max_evs = config_data['MAX_EVS']
+        self.max_base_stats = config_data['MAX_BASE_STATS']
+        self.natures = config_data['NATURES']
+
+        # Feature layout, fixed for the run by the whitelist
+        self.move_index = {m: i for i, m in enumerate(whitelist.moves)}
+        self.type_index = {t: i for i, t in enumerate(whitelist.types)}
+        self.ability_index = {a.lower(): i for i, a in enumerate(whitelist.abilities)}
+        self.is_custom = whitelist.is_custom
+        self.n_features = 1 + 6 + 6 + len(self.move_index)
+        if self.is_custom:
+            self.n_features += 6 + len(self.type_index) + len(self.ability_index)
+
+        self.opponents = None   # Column order of the targets, taken from the first sample
+        self.samples_x = []
+        self.samples_y = []
+        self.weights = None
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.candidates = 0
+        self.kept = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.weights is not None
+
+    def features(self, genome) -> np.ndarray:
+        x = np.zeros(self.n_features)
+        x[0] = 1.0  # Bias
+        for i, stat in enumerate(STAT_KEYS):
+            x[1 + i] = genome.evs.get(stat, 0) / self.max_evs
+        up, down = self.natures.get(genome.nature, (None, None))
+        if up and up != down:
+            x[7 + STAT_KEYS.index(up)] += 1.0
+            x[7 + STAT_KEYS.index(down)] -= 1.0
+        offset = 13
+        for move in genome.moves:
+            i = self.move_index.get(move)
+            if i is not None:
+                x[offset + i] = 1.0
+        offset += len(self.move_index)
+        if self.is_custom:
+            for i, stat in enumerate(STAT_KEYS):
+                x[offset + i] = genome.stats.get(stat, 0) / self.max_base_stats
+            offset += 6
+            for t in genome.types:
+                i = self.type_index.get(t)
+                if i is not None:
+                    x[offset + i] = 1.0
+            offset += len(self.type_index)
+            i = self.ability_index.get((genome.ability or "").lower())
+            if i is not None:
+                x[offset + i] = 1.0
+        return x
+
+    def observe(self, genomes):
+        """Adds the per-opponent results of freshly evaluated genomes to the training set."""
+        for genome in genomes:
+            wins = genome.matchup_wins
+            if not wins:
+                continue
+            if self.opponents is None:
+                self.opponents = list(wins)
+            self.samples_x.append(self.features(genome))
+            self.samples_y.append([wins.get(o, 0) / BATTLES_PER_OPPONENT for o in self.opponents])
+        if len(self.samples_x) > self.max_samples:
+            del self.samples_x[:-self.max_samples]
+            del self.samples_y[:-self.max_samples]
+
+    def fit(self):
+        if len(self.samples_x) < self.min_samples:
+            return
+        X = np.array(self.samples_x)
+        Y = np.array(self.samples_y)
+        A = X.T @ X + self.ridge * np.eye(X.shape[1])
+        self.weights = np.linalg.solve(A, X.T @ Y)
+
+    def predict(self, genomes) -> np.ndarray:
+        """Expected fitness of each genome under the diminishing-returns scoring."""
+        X = np.array([self.features(g) for g in genomes])
+        p = np.clip(X @ self.weights, 0.0, 1.0)
+        # P(at least k wins out of BATTLES_PER_OPPONENT) with per-battle win probability p
+        n = BATTLES_PER_OPPONENT
+        expected = 0.0
+        for k, score in enumerate(self.score_per_win, start=1):
+            at_least_k = sum(math.comb(n, w) * p ** w * (1 - p) ** (n - w) for w in range(k, n + 1))
+            expected = expected + score * at_least_k
+        return expected.sum(axis=1)
+
+    def candidates_for(self, count: int) -> int:
+        """How many candidates to breed so that `count` survive screening."""
+        if not self.ready:
+            return count
+        return math.ceil(count / self.screen_fraction)
+
+    def screen(self, candidates: list, keep: int) -> list:
+        """Returns the `keep` candidates with the best predicted fitness."""
+        self.candidates += len(candidates)
+        self.kept += min(keep, len(candidates))
+        if not self.ready or len(candidates) <= keep:
+            return candidates[:keep]
+        predictions = self.predict(candidates)
+        for genome, prediction in zip(candidates, predictions):
+            genome.predicted_fitness = float(prediction)
+        order = np.argsort(-predictions)[:keep]
+        return [candidates[i] for i in sorted(order)]
+
+    def report(self, genomes) -> dict:
+        """
+        Screening ratio since the last report and prediction accuracy on the given
+        (now evaluated) genomes that were screened: mean absolute error and the
+        rank correlation between predicted and real fitness.
+        """
+        screened = [g for g in genomes if g.predicted_fitness is not None]
+        report = {
+            'samples': len(self.samples_x),
+            'candidates': self.candidates,
+            'evaluated': self.kept,
+            'ratio': self.kept / self.candidates if self.candidates else None,
+            'mae': None,
+            'rank_corr': None,
+        }
+        if len(screened) >= 2:
+            predicted = np.array([g.predicted_fitness for g in screened])
+            actual = np.array([g.fitness for g in screened], dtype=float)
+            report['mae'] = float(np.abs(predicted - actual).mean())
+            ranks_p = predicted.argsort().argsort()
+            ranks_a = actual.argsort().argsort()
+            if ranks_p.std() > 0 and ranks_a.std() > 0:
+                report['rank_corr'] = float(np.corrcoef(ranks_p, ranks_a)[0, 1])
+        for genome in screened:
+            genome.predicted_fitness = None
+        self.reset_counters()
+        return report
+
+    @staticmethod
+    def summary(report: dict) -> str:
+        if not report['candidates'] or report['ratio'] == 1.0:
+            state = "screening from next generation" if report.get('active') else "training"
+            return f"Surrogate: {state} ({report['samples']} samples)"
+        parts = [f"Surrogate: evaluated {report['evaluated']}/{report['candidates']} candidates "
+                 f"(ratio {report['ratio']:.2f})"]
+        if report['mae'] is not None:
+            parts.append(f"MAE {report['mae']:.0f}")
+        if report['rank_corr'] is not None:
+            parts.append(f"rank corr {report['rank_corr']:.2f}")
+        parts.append(f"{report['samples']} samples")
+        return " | ".join(parts)
@@ -0,0 +1,253 @@
+import os
+import json
+import math
+import time
+import random
+import hashlib
+
+from pokemon_genome import PokemonGenome
+from battle_evaluator import play_tournament_game, print_battle_text
+from evaluation_pool import game_pool
+from sim_runtime import ensure_simulator_started
+
+ELO_INITIAL = 1500.0
+ELO_K = 32.0
+
+
+def _play_games(champions: list, games: list, config_data: dict, record: bool, pool) -> list:
+    """
+    Plays (first, second, seed) games between champion indices and returns their
+    results in the same order: spread over the tournament's pool (see
+    run_final_tournament) if it has one and there is more than one game, else
+    here, one by one.
+    """
+    if pool is None or len(games) <= 1:
+        return [play_tournament_game(champions[a], champions[b], config_data, seed, record)
+                for a, b, seed in games]
+    futures = [pool.submit_game(champions[a], champions[b], seed, record) for a, b, seed in games]
+    return [future.result() for future in futures]
+
+
+def _play_pairings(champions: list, pairings: list, config_data: dict, pool) -> list:
+    """
+    Plays TOURNAMENT_GAMES_PER_PAIRING games for every (i, j) pairing of champion
+    indices, alternating which one is trainer 1, all in parallel. Returns, per
+    pairing, i's score in each game (1 win, 0.5 draw, 0 loss) and the total turns.
+    """
+    games_per_pairing = max(1, config_data.get('TOURNAMENT_GAMES_PER_PAIRING', 3))
+    record = config_data.get('TOURNAMENT_REPLAY_LOG', False)
+    games = []
+    for i, j in pairings:
+        for game in range(games_per_pairing):
+            first, second = (i, j) if game % 2 == 0 else (j, i)
+            games.append((first, second, random.getrandbits(32)))
+    results = _play_games(champions, games, config_data, record, pool)
+
+    outcomes = []
+    for p, (i, j) in enumerate(pairings):
+        scores, turns = [], 0
+        for g in range(p * games_per_pairing, (p + 1) * games_per_pairing):
+            first, second, _ = games[g]
+            winner, game_turns, text = results[g]
+            turns += game_turns
+            if winner is None:
+                scores.append(0.5)
+            else:
+                scores.append(1.0 if (first if winner == 1 else second) == i else 0.0)
+            if text:
+                print_battle_text(f"--- GAME: ID {champions[first].genome_id} vs. ID {champions[second].genome_id} ---", text)
+        outcomes.append((scores, turns))
+    return outcomes
+
+
+def _label(champion: PokemonGenome) -> str:
+    return f"{champion.name} (ID {champion.genome_id})"
+
+
+def _pairing_line(label_i: str, label_j: str, scores: list, turns: int) -> str:
+    return f"{label_i} vs. {label_j}: {scores.count(1.0)}-{scores.count(0.0)} (avg {turns / len(scores):.1f} turns)"
+
+
+def run_final_tournament(champions: list, config_data: dict) -> PokemonGenome:
+    """
+    Ranks the species champions and returns the best one.
+    TOURNAMENT_MODE "round_robin" plays every pairing; "swiss" plays about
+    log2(n) rounds of Elo-rated Swiss pairings (see _run_swiss). Every pairing
+    plays TOURNAMENT_GAMES_PER_PAIRING games, alternating which champion is
+    trainer 1, and the games of a round run in parallel. With
+    MAX_CONCURRENT_EVALUATIONS > 1 the whole tournament plays in one game_pool:
+    the session pool the run evaluated in, if it is still running, or else a
+    temporary pool, whatever the EVALUATION_BACKEND. With
+    TOURNAMENT_REPLAY_LOG the full text of every game is printed as well.
+    """
+    mode = config_data.get('TOURNAMENT_MODE', "round_robin")
+    games_per_pairing = max(1, config_data.get('TOURNAMENT_GAMES_PER_PAIRING', 3))
+    print(f"\n--- Starting Final Tournament with {len(champions)} Champions "
+          f"({mode}, {games_per_pairing} games per pairing) ---")
+    if not champions:
+        print("No champions to run tournament with.")
+        return None
+
+    ensure_simulator_started()
+    start = time.perf_counter()
+    pool = None
+    if config_data.get('MAX_CONCURRENT_EVALUATIONS', 1) > 1 and (len(champions) > 1 or mode == "swiss"):
+        pool = game_pool(config_data)
+    try:
+        if mode == "swiss":
+            ultimate_winner, games = _run_swiss(champions, config_data, pool)
+        else:
+            if mode != "round_robin":
+                print(f"Unknown TOURNAMENT_MODE '{mode}', playing a round robin.")
+            ultimate_winner, games = _run_round_robin(champions, config_data, pool)
+    finally:
+        if pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+    print(f"\n--- TOURNAMENT COMPLETE: {games} games in {elapsed:.2f}s ---")
+
+    if ultimate_winner:
+        print(f"\n--- ULTIMATE CHAMPION (ID {ultimate_winner.genome_id}) ---")
+        print(str(ultimate_winner))
+    return ultimate_winner
+
+
+def _run_round_robin(champions: list, config_data: dict, pool) -> tuple:
+    """Every champion plays every other one; the most game wins takes it. Returns (winner, games played)."""
+    pairings = [(i, j) for i in range(len(champions)) for j in range(i + 1, len(champions))]
+    outcomes = _play_pairings(champions, pairings, config_data, pool)
+
+    tournament_wins = {champ.genome_id: 0 for champ in champions}
+    games = 0
+    for (i, j), (scores, turns) in zip(pairings, outcomes):
+        tournament_wins[champions[i].genome_id] += scores.count(1.0)
+        tournament_wins[champions[j].genome_id] += scores.count(0.0)
+        games += len(scores)
+        print(_pairing_line(_label(champions[i]), _label(champions[j]), scores, turns))
+
+    print("Final Standings (Wins):")
+    best_genome_id = -1
+    max_wins = -1
+    for genome_id, wins in tournament_wins.items():
+        print(f"Genome {genome_id}: {wins} wins")
+        if wins > max_wins:
+            max_wins = wins
+            best_genome_id = genome_id
+    return next((g for g in champions if g.genome_id == best_genome_id), None), games
+
+
+def rating_key(genome: PokemonGenome) -> str:
+    """Identifies a champion across runs by its genes (genome ids restart every run)."""
+    return hashlib.sha1(repr(genome.fingerprint()).encode("utf-8")).hexdigest()[:16]
+
+
+def load_ratings(path) -> dict:
+    """{rating key: {"rating", "games", "played", "genome"}} from a TOURNAMENT_RATINGS_FILE, or {}."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_ratings(path, ratings: dict):
+    """Writes a temporary file next to `path` and moves it over, so a crash never leaves a truncated file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(ratings, f, indent=1)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _expected_score(rating: float, opponent_rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def _swiss_pairings(order: list, played: list, new_players: int) -> list:
+    """
+    Pairs players in rating order, each with the next unpaired one it has not met
+    (falling back to the next unpaired one). Players at indices >= new_players come
+    from earlier runs and are never paired again with one they already met. With an
+    odd count the last player sits out.
+    """
+    pairings, paired = [], set()
+    for position, i in enumerate(order):
+        if i in paired:
+            continue
+        candidates = [j for j in order[position + 1:] if j not in paired
+                      and not (i >= new_players and j >= new_players and j in played[i])]
+        if not candidates:
+            continue
+        j = next((j for j in candidates if j not in played[i]), candidates[0])
+        pairings.append((i, j))
+        paired.update((i, j))
+    return pairings
+
+
+def _run_swiss(champions: list, config_data: dict, pool) -> tuple:
+    """
+    Swiss-system tournament with Elo ratings. Champions from earlier runs stored in
+    TOURNAMENT_RATINGS_FILE join with their ratings and match history, so they are
+    ranked against the new ones without replaying their old games. Each round pairs
+    players of similar rating who have not met yet; SWISS_ROUNDS (default
+    ceil(log2(players))) rounds need O(n log n) games instead of O(n^2).
+    Returns (the best rated champion of this run, games played).
+    """
+    path = config_data.get('TOURNAMENT_RATINGS_FILE')
+    ratings = load_ratings(path)
+
+    players = list(champions)
+    keys = [rating_key(g) for g in champions]
+    for key, entry in ratings.items():
+        if key not in keys:
+            players.append(PokemonGenome.from_dict(entry["genome"], config_data))
+            keys.append(key)
+    previous = len(players) - len(champions)
+    for key, genome in zip(keys, players):
+        entry = ratings.setdefault(key, {"rating": ELO_INITIAL, "games": 0, "played": []})
+        entry["genome"] = genome.to_dict()
+    if previous:
+        print(f"{previous} champions from earlier runs join with their ratings.")
+    # Genome ids restart every run, so earlier champions go by their rating key
+    labels = [_label(g) if i < len(champions) else f"{g.name} ({keys[i][:8]}, earlier run)"
+              for i, g in enumerate(players)]
+
+    rounds = config_data.get('SWISS_ROUNDS') or max(1, math.ceil(math.log2(max(2, len(players)))))
+    index_of = {key: i for i, key in enumerate(keys)}
+    played = [{index_of[k] for k in ratings[key]["played"] if k in index_of} for key in keys]
+    games = 0
+    for round_number in range(1, rounds + 1):
+        order = sorted(range(len(players)), key=lambda i: (-ratings[keys[i]]["rating"], keys[i]))
+        pairings = _swiss_pairings(order, played, len(champions))
+        if not pairings:
+            break
+        print(f"Round {round_number}/{rounds}:")
+        outcomes = _play_pairings(players, pairings, config_data, pool)
+        for (i, j), (scores, turns) in zip(pairings, outcomes):
+            entry_i, entry_j = ratings[keys[i]], ratings[keys[j]]
+            for score in scores:
+                expected = _expected_score(entry_i["rating"], entry_j["rating"])
+                entry_i["rating"] += ELO_K * (score - expected)
+                entry_j["rating"] -= ELO_K * (score - expected)
+            entry_i["games"] += len(scores)
+            entry_j["games"] += len(scores)
+            if keys[j] not in entry_i["played"]:
+                entry_i["played"].append(keys[j])
+                entry_j["played"].append(keys[i])
+            played[i].add(j)
+            played[j].add(i)
+            games += len(scores)
+            print("  " + _pairing_line(labels[i], labels[j], scores, turns))
+
+    print("Final Standings (Elo):")
+    order = sorted(range(len(players)), key=lambda i: -ratings[keys[i]]["rating"])
+    for i in order:
+        entry = ratings[keys[i]]
+        print(f"{labels[i]}: {entry['rating']:.0f} ({entry['games']} games)")
+    if path:
+        save_ratings(path, ratings)
+        print(f"Ratings saved to {path}.")
+    best = next(i for i in order if i < len(champions))
+    return champions[best], games
@@ -11,11 +11,13 @@ import asyncio
 import queue
 import sys
 import traceback
+from collections import deque
 
 # Keep your original logic imports
 from pokemon_genome import PokemonGenome
-from evolutionary_algorithm import EvolutionaryAlgorithm
-from battle_evaluator import run_final_tournament
+from island_model import create_evolution
+from profiling import EvolutionHooks
+from tournament import run_final_tournament
 import config as defaultConfig
 
 from matplotlib.figure import Figure
@@ -26,12 +28,48 @@ import matplotlib.pyplot as plt
 plt.style.use('dark_background') 
 
 class TextRedirector:
-    def __init__(self, queue: queue.Queue):
-        self.queue = queue
+    """
+    Collects the evolution thread's output for the log widget. Writes are
+    split into lines and never wait for the UI: the buffer keeps the last
+    `max_lines` lines and counts the older ones it drops (in `dropped`) when
+    the UI falls behind. With `detail` False, battle and game text
+    (write_detail) is left out.
+    """
+    def __init__(self, max_lines: int, detail: bool = True):
+        self.lines = deque(maxlen=max_lines)   # The last one may still lack its "\n"
+        self.detail = detail
+        self.dropped = 0
+        self.lock = threading.Lock()
     def write(self, text):
-        self.queue.put(text)
+        parts = text.splitlines(keepends=True)
+        with self.lock:
+            if parts and self.lines and not self.lines[-1].endswith("\n"):
+                self.lines[-1] += parts.pop(0)
+            for part in parts:
+                if len(self.lines) == self.lines.maxlen:
+                    self.dropped += 1
+                self.lines.append(part)
+    def write_detail(self, text):
+        if self.detail:
+            self.write(text)
     def flush(self):
         pass
+    def drain(self) -> str:
+        """Everything written since the last drain, as one string."""
+        with self.lock:
+            text = "".join(self.lines)
+            self.lines.clear()
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            text = f"[... {dropped} earlier log lines dropped ...]\n" + text
+        return text
+
+class HistoryStreamHook(EvolutionHooks):
+    """Hands each finished generation's history record from the evolution thread to the UI."""
+    def __init__(self, history_queue: queue.Queue):
+        self.queue = history_queue
+    def on_generation_end(self, generation, record):
+        self.queue.put({k: record[k] for k in ('gen', 'best_fitness', 'avg_fitness', 'num_species')})
 
 class ChampionViewerWindow(ttk.Toplevel):
     def __init__(self, master, genome: PokemonGenome):
@@ -154,9 +192,14 @@ class EvolutionApp(ttk.Window):
         
         self.pokemon_db = pokemon_db
         self.champions_data = {}
-        self.log_queue = queue.Queue()
+        self.log_max_lines = defaultConfig.GUI_LOG_MAX_LINES
         self.progress_queue = queue.Queue()
-        self.stdout_redirector = TextRedirector(self.log_queue)
+        self.history_queue = queue.Queue()
+        # Lines of the live convergence graph while a run is plotted (see start_live_graph)
+        self.live_lines = []
+        self.live_history = []
+        self.graph_background = None
+        self.stdout_redirector = TextRedirector(self.log_max_lines, defaultConfig.GUI_LOG_LEVEL == "detail")
         self.param_vars = {}
         
         # Set the icon if you have one, otherwise skip
@@ -165,6 +208,7 @@ class EvolutionApp(ttk.Window):
         self._create_widgets()
         self.after(100, self._process_log_queue)
         self.after(100, self._process_progress_queue)
+        self.after(250, self._process_history_queue)
 
     def _create_widgets(self):
         # 1. Sidebar (Control Panel)
@@ -243,6 +287,7 @@ class EvolutionApp(ttk.Window):
         self.graph_figure.patch.set_facecolor('#2b3e50') 
         self.graph_canvas = FigureCanvasTkAgg(self.graph_figure, self.graph_tab)
         self.graph_canvas.get_tk_widget().pack(side=TOP, fill=BOTH, expand=True)
+        self.graph_canvas.mpl_connect('draw_event', self._on_graph_draw)
         self.plot_evolution_graph(None)
 
         # --- Tab 3: Champions ---
@@ -322,6 +367,7 @@ class EvolutionApp(ttk.Window):
         reset_button.pack(pady=30)
 
     def plot_evolution_graph(self, history_data):
+        self.live_lines = []
         self.graph_figure.clear()
         ax1 = self.graph_figure.add_subplot(111)
         
@@ -364,6 +410,72 @@ class EvolutionApp(ttk.Window):
         self.graph_figure.tight_layout()
         self.graph_canvas.draw()
 
+    def start_live_graph(self, generations):
+        """
+        Empty axes for a new run. Finished generations then only update the
+        data of the three lines (update_live_graph) instead of rebuilding the figure.
+        """
+        self.graph_figure.clear()
+        ax1 = self.graph_figure.add_subplot(111)
+        ax1.set_facecolor('#2b3e50')
+        ax1.grid(True, color='#4e5d6c', linestyle='--')
+        ax1.set_xlabel('Generation', color='white')
+        ax1.set_ylabel('Fitness Score', color='white')
+        ax1.tick_params(colors='white')
+        ax2 = ax1.twinx()
+        ax2.set_ylabel('Species Count', color='#d9534f')
+        ax2.tick_params(axis='y', labelcolor='#d9534f')
+
+        # Animated lines are skipped by full redraws and blitted over the cached background
+        p1, = ax1.plot([], [], '#62c462', label='Best Fitness', linewidth=2, animated=True)
+        p2, = ax1.plot([], [], '#5bc0de', label='Avg. Fitness', linestyle='--', animated=True)
+        p3, = ax2.plot([], [], '#d9534f', label='Num. Species', linestyle=':', animated=True)
+        lines = [p1, p2, p3]
+        ax1.legend(lines, [l.get_label() for l in lines], loc='upper left', facecolor='#2b3e50', edgecolor='white', labelcolor='white')
+        ax1.set_xlim(1, max(2, generations))
+        ax1.set_ylim(0, 1000)
+        ax2.set_ylim(0, 10)
+
+        self.live_lines = lines
+        self.live_history = []
+        self.graph_figure.tight_layout()
+        self.graph_canvas.draw()
+
+    def _on_graph_draw(self, event):
+        """After a full redraw (new axis limits, resized window): caches the background and draws the live lines on it."""
+        if not self.live_lines:
+            return
+        self.graph_background = self.graph_canvas.copy_from_bbox(self.graph_figure.bbox)
+        for line in self.live_lines:
+            line.axes.draw_artist(line)
+
+    def update_live_graph(self, records):
+        if not self.live_lines:
+            return
+        self.live_history.extend(records)
+        gens = [d['gen'] for d in self.live_history]
+        columns = [[d[key] for d in self.live_history] for key in ('best_fitness', 'avg_fitness', 'num_species')]
+        redraw = False
+        for line, values in zip(self.live_lines, columns):
+            line.set_data(gens, values)
+            bottom, top = line.axes.get_ylim()
+            if min(values) < bottom or max(values) > top:
+                # Grow with headroom, so the axes are rebuilt only a few times per run
+                line.axes.set_ylim(min(bottom, min(values) * 1.25), max(top, max(values) * 1.25))
+                redraw = True
+        ax1 = self.live_lines[0].axes
+        if gens[-1] > ax1.get_xlim()[1]:
+            ax1.set_xlim(1, gens[-1] * 2)
+            redraw = True
+
+        if redraw:
+            self.graph_canvas.draw()  # _on_graph_draw recaches the background
+        else:
+            self.graph_canvas.restore_region(self.graph_background)
+            for line in self.live_lines:
+                line.axes.draw_artist(line)
+            self.graph_canvas.blit(self.graph_figure.bbox)
+
     def reset_hyperparameters(self):
         for param_name, var in self.param_vars.items():
             default_value = getattr(defaultConfig, param_name, "")
@@ -379,11 +491,42 @@ class EvolutionApp(ttk.Window):
                 except ValueError: value = value_str
             current_config[param_name] = value
         current_config["MOVE_POOL"] = defaultConfig.MOVE_POOL
+        current_config["RESTRICT_LEARNSET_TO_MOVE_POOL"] = defaultConfig.RESTRICT_LEARNSET_TO_MOVE_POOL
         current_config["POKEMON_TYPES"] = defaultConfig.POKEMON_TYPES
         current_config["NATURES"] = defaultConfig.NATURES
         current_config["ABILITY_POOL"] = defaultConfig.ABILITY_POOL
         current_config["GAUNTLET"] = defaultConfig.GAUNTLET
         current_config["SIMPLE_GAUNTLET"] = defaultConfig.SIMPLE_GAUNTLET
+        current_config["EVALUATION_BACKEND"] = defaultConfig.EVALUATION_BACKEND
+        current_config["EVOLUTION_MODE"] = defaultConfig.EVOLUTION_MODE
+        current_config["TASK_GRANULARITY"] = defaultConfig.TASK_GRANULARITY
+        current_config["PERSISTENT_WORKERS"] = defaultConfig.PERSISTENT_WORKERS
+        current_config["DISTRIBUTED_HOST"] = defaultConfig.DISTRIBUTED_HOST
+        current_config["DISTRIBUTED_PORT"] = defaultConfig.DISTRIBUTED_PORT
+        current_config["DISTRIBUTED_LOCAL_WORKERS"] = defaultConfig.DISTRIBUTED_LOCAL_WORKERS
+        current_config["HEARTBEAT_TIMEOUT"] = defaultConfig.HEARTBEAT_TIMEOUT
+        current_config["DISTRIBUTED_CONNECT_TIMEOUT"] = defaultConfig.DISTRIBUTED_CONNECT_TIMEOUT
+        current_config["ISLAND_COUNT"] = defaultConfig.ISLAND_COUNT
+        current_config["MIGRATION_INTERVAL"] = defaultConfig.MIGRATION_INTERVAL
+        current_config["MIGRATION_SIZE"] = defaultConfig.MIGRATION_SIZE
+        current_config["SURROGATE_SCREENING"] = defaultConfig.SURROGATE_SCREENING
+        current_config["SURROGATE_SCREEN_FRACTION"] = defaultConfig.SURROGATE_SCREEN_FRACTION
+        current_config["SURROGATE_MIN_SAMPLES"] = defaultConfig.SURROGATE_MIN_SAMPLES
+        current_config["MATCHUP_PREFILTER"] = defaultConfig.MATCHUP_PREFILTER
+        current_config["MATCHUP_PREFILTER_CONFIDENCE"] = defaultConfig.MATCHUP_PREFILTER_CONFIDENCE
+        current_config["REEVALUATE_ELITES"] = defaultConfig.REEVALUATE_ELITES
+        current_config["SCORE_PER_WIN"] = defaultConfig.SCORE_PER_WIN
+        current_config["BATTLE_LOG"] = defaultConfig.BATTLE_LOG
+        current_config["BATTLE_REPLAY_DIR"] = defaultConfig.BATTLE_REPLAY_DIR
+        current_config["TOURNAMENT_GAMES_PER_PAIRING"] = defaultConfig.TOURNAMENT_GAMES_PER_PAIRING
+        current_config["TOURNAMENT_REPLAY_LOG"] = defaultConfig.TOURNAMENT_REPLAY_LOG
+        current_config["TOURNAMENT_MODE"] = defaultConfig.TOURNAMENT_MODE
+        current_config["SWISS_ROUNDS"] = defaultConfig.SWISS_ROUNDS
+        current_config["TOURNAMENT_RATINGS_FILE"] = defaultConfig.TOURNAMENT_RATINGS_FILE
+        current_config["COLLECT_SEARCH_STATS"] = defaultConfig.COLLECT_SEARCH_STATS
+        current_config["LOG_PHASE_TIMINGS"] = defaultConfig.LOG_PHASE_TIMINGS
+        current_config["PROFILE_MODE"] = defaultConfig.PROFILE_MODE
+        current_config["PROFILE_OUTPUT_DIR"] = defaultConfig.PROFILE_OUTPUT_DIR
         return current_config
 
     def start_experiment(self):
@@ -392,17 +535,24 @@ class EvolutionApp(ttk.Window):
         self.champion_tree.delete(*self.champion_tree.get_children())
         self.champions_data.clear()
         self.notebook.select(0) # Go to Logs
-        self.plot_evolution_graph(None)
         
         selected_pokemon_name = self.pokemon_var.get()
         self.current_config_data = self.get_current_config()
+        self._drain_history_queue()  # Drop what is left of an earlier run
+        self.start_live_graph(self.current_config_data.get('GENERATIONS', 1))
         
         if selected_pokemon_name == "Mewthree (From Scratch)":
             self.base_pokemon = {"name": "custom_god_pokemon", "ability": "Pressure"}
         else:
             name_key = selected_pokemon_name.lower()
-            self.base_pokemon = self.pokemon_db[name_key]
-            self.base_pokemon['name'] = name_key
+            self.base_pokemon = dict(self.pokemon_db[name_key], name=name_key)
+            if self.current_config_data.get('RESTRICT_LEARNSET_TO_MOVE_POOL'):
+                move_pool = self.current_config_data['MOVE_POOL']
+                if hasattr(self.pokemon_db, 'pool_intersection'):
+                    self.base_pokemon['learnset'] = self.pokemon_db.pool_intersection(name_key, move_pool)
+                else:  # Plain POKEMON_DATABASE dict (no pokemon_data.bin)
+                    pool = set(move_pool)
+                    self.base_pokemon['learnset'] = [m for m in self.base_pokemon['learnset'] if m in pool]
             
         self.log_text.insert(tk.END, ">>> INITIALIZING EXPERIMENT THREAD...\n")
         
@@ -429,7 +579,7 @@ class EvolutionApp(ttk.Window):
             print(f">>> MODE: ADVANCED (MINIMAX)")
             print(">>> LOADING GENETIC PARAMETERS...")
             # Removed mode argument
-            ea = EvolutionaryAlgorithm(base_pokemon_data, config_data)
+            ea = create_evolution(base_pokemon_data, config_data, hooks=[HistoryStreamHook(self.history_queue)])
             species_champions, history_data = asyncio.run(ea.run(progress_cb))
             if species_champions:
                 print("\n>>> EVOLUTION COMPLETE.")
@@ -461,6 +611,21 @@ class EvolutionApp(ttk.Window):
         except queue.Empty:
             pass
         self.after(100, self._process_progress_queue)
+
+    def _drain_history_queue(self) -> list:
+        records = []
+        try:
+            while True:
+                records.append(self.history_queue.get_nowait())
+        except queue.Empty:
+            pass
+        return records
+
+    def _process_history_queue(self):
+        records = self._drain_history_queue()
+        if records:
+            self.update_live_graph(records)
+        self.after(250, self._process_history_queue)
         
     def finish_experiment(self, champions, winner, history_data):
         print(">>> UPDATE: UI SYNC COMPLETE.")
@@ -495,11 +660,12 @@ class EvolutionApp(ttk.Window):
                 ChampionViewerWindow(self, genome)
 
     def _process_log_queue(self):
-        try:
-            while True:
-                msg = self.log_queue.get_nowait()
-                self.log_text.insert(tk.END, msg)
-                self.log_text.see(tk.END)
-        except queue.Empty:
-            pass
+        text = self.stdout_redirector.drain()
+        if text:
+            # One insert and one scroll per tick, then trim the log to its last lines
+            self.log_text.insert(tk.END, text)
+            excess = int(self.log_text.index('end-1c').split('.')[0]) - self.log_max_lines
+            if excess > 0:
+                self.log_text.delete('1.0', f'{excess + 1}.0')
+            self.log_text.see(tk.END)
         self.after(100, self._process_log_queue)
\ No newline at end of file